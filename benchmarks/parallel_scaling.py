@@ -0,0 +1,62 @@
+import argparse
+import logging
+import time
+
+import pandas as pd
+
+from src.parallel import calculate_card_info_parallel, spending_by_category_parallel, top_transactions_parallel
+from src.reports import spending_by_category
+from src.utils import calculate_card_info, top_transactions
+from tests.synthetic_data import synthetic_transactions
+
+
+def measure(func):
+    """Возвращает результат функции и время ее выполнения в секундах"""
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Масштабирование параллельного расчета по числу процессов")
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--threads", action="store_true", help="пул потоков вместо пула процессов")
+    arguments = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    transactions = synthetic_transactions(arguments.rows)
+    date = "2021-06-15 12:00:00"
+
+    tasks = {
+        "calculate_card_info": (
+            lambda: calculate_card_info(transactions),
+            lambda workers: calculate_card_info_parallel(transactions, workers, use_threads=arguments.threads),
+        ),
+        "top_transactions": (
+            lambda: top_transactions(transactions.copy()),
+            lambda workers: top_transactions_parallel(transactions, workers, use_threads=arguments.threads),
+        ),
+        "spending_by_category": (
+            lambda: spending_by_category.__wrapped__(transactions.copy(), "Супермаркеты", date),
+            lambda workers: spending_by_category_parallel.__wrapped__(
+                transactions, "Супермаркеты", date, workers, arguments.threads
+            ),
+        ),
+    }
+
+    print(f"Строк: {arguments.rows}, пул: {'потоков' if arguments.threads else 'процессов'}")
+    for name, (serial, parallel) in tasks.items():
+        expected, serial_time = measure(serial)
+        print(f"\n{name}: последовательно {serial_time:.3f} с")
+        for workers in arguments.workers:
+            result, parallel_time = measure(lambda: parallel(workers))
+            if isinstance(expected, pd.DataFrame):
+                pd.testing.assert_frame_equal(result, expected)
+            else:
+                assert result == expected, f"{name}: результат при {workers} процессах отличается"
+            print(f"  {workers} процессов: {parallel_time:.3f} с, ускорение {serial_time / parallel_time:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
+from src.market_data import currency_rates_table
 from src.reports import spending_by_category
-from src.services import dataframe_to_dict_with_str, search_transactions
-from src.utils import API_KEY_CURRENCY, API_KEY_STOCK, data_from_excel
+from src.rollup import load_rollup
+from src.services import search_transactions_dataframe
+from src.utils import API_KEY_CURRENCY, API_KEY_STOCK, convert_to_base_currency, data_from_excel, encode_descriptions
 from src.views import get_main_page
 
 if API_KEY_CURRENCY is None:
@@ -13,23 +15,37 @@ if __name__ == "__main__":
     date_time_str = "2020-04-27 19:30:30"
     file_path_user_settings = "../data/user_settings.json"
     base_currency = "RUB"
-    all_transactions = data_from_excel("../data/operations.xlsx")
+    market_data_path = "../data/market_data.db"
+    file_path_operations = "../data/operations.xlsx"
+    all_transactions = encode_descriptions(data_from_excel(file_path_operations))
+
+    # Пересчет сумм в базовую валюту и итоги по месяцам, дням, картам и категориям (сохраняются рядом с данными)
+    rates_table = currency_rates_table(market_data_path, base_currency)
+    try:
+        all_transactions = convert_to_base_currency(all_transactions, rates_table, base_currency)
+    except ValueError as error:
+        # Без курсов части валют суммы по картам были бы неполными - считаем в исходных суммах
+        print(f"{error}. Суммы считаются без пересчета в базовую валюту, котировки - через API", "\n")
+        market_data_path, rates_table = None, None
+    # Итоги перестраиваются и при изменении файла операций, и при изменении курсов в хранилище
+    rollup = load_rollup(file_path_operations, all_transactions, rates_table=rates_table)
 
     # ========================= Веб страницы: «Главная» =========================
     print("===== Веб страницы: «Главная» =====", "\n")
 
     # Печать JSON-ответа
-    print(get_main_page(date_time_str, all_transactions, file_path_user_settings, base_currency))
+    print(
+        get_main_page(
+            date_time_str, all_transactions, file_path_user_settings, base_currency, market_data_path, rollup
+        )
+    )
 
     # ========================= Сервисы: «Простой поиск» =========================
     print("\n\n", "===== Сервисы: «Простой поиск» =====", "\n")
-    # Получение транзакций в виде словаря
-    transactions_dict = dataframe_to_dict_with_str(all_transactions)
-
-    # Запуск простого поиска и печать JSON-ответа
-    print(search_transactions(transactions_dict, "Ozon.ru"))
+    # Запуск простого поиска по уникальным описаниям и категориям и печать JSON-ответа
+    print(search_transactions_dataframe(all_transactions, "Ozon.ru"))
 
     # ========================= Отчеты: «Траты по категории» =========================
     print("\n\n", "===== Отчеты: «Траты по категории» =====", "\n")
     # Выводим траты по заданной категории за последние три месяца (от переданной даты)
-    print(spending_by_category(all_transactions, "Супермаркеты", date_time_str))
+    print(spending_by_category(all_transactions, "Супермаркеты", date_time_str, rollup))
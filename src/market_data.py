@@ -0,0 +1,268 @@
+import logging
+import sqlite3
+from contextlib import closing
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from src.utils import info_currency_rates, info_stock_prices
+
+# Настройка логирования
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+DATE_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+# Допустимый возраст котировки для отчета за прошлую дату (выходные и праздники без торгов)
+MAX_QUOTE_AGE = timedelta(days=7)
+
+
+def connect_market_data(db_path):
+    """Открывает локальное хранилище котировок и создает таблицы при необходимости"""
+    logging.info(f"Подключение к хранилищу котировок: {db_path}")
+    connection = sqlite3.connect(db_path)
+
+    # Первичный ключ (инструмент, время) - это B-дерево, поэтому поиск "на дату" выполняется за O(log n)
+    connection.executescript(
+        """
+        CREATE TABLE IF NOT EXISTS currency_rates (
+            base_currency TEXT NOT NULL,
+            currency TEXT NOT NULL,
+            timestamp TEXT NOT NULL,
+            rate REAL NOT NULL,
+            PRIMARY KEY (base_currency, currency, timestamp)
+        );
+        CREATE TABLE IF NOT EXISTS stock_prices (
+            stock TEXT NOT NULL,
+            timestamp TEXT NOT NULL,
+            price REAL NOT NULL,
+            PRIMARY KEY (stock, timestamp)
+        );
+        """
+    )
+    return connection
+
+
+def normalize_timestamp(value):
+    """Приводит дату к строке 'YYYY-MM-DD HH:MM:SS', которая корректно сортируется в SQLite"""
+    if isinstance(value, str):
+        try:
+            value = datetime.strptime(value, DATE_TIME_FORMAT)
+        except ValueError:
+            try:
+                value = datetime.strptime(value, "%Y-%m-%d")
+            except ValueError:
+                logging.error(f"Некорректный формат даты и времени: {value}")
+                raise ValueError("Некорректный формат даты и времени")
+    return pd.Timestamp(value).strftime(DATE_TIME_FORMAT)
+
+
+def save_currency_rates(db_path, base_currency, currency_rates, timestamp):
+    """Сохраняет курсы валют (в формате info_currency_rates) в хранилище на заданный момент времени"""
+    timestamp = normalize_timestamp(timestamp)
+    rows = [(base_currency, item["currency"], timestamp, item["rate"]) for item in currency_rates]
+
+    with closing(connect_market_data(db_path)) as connection, connection:
+        connection.executemany("INSERT OR REPLACE INTO currency_rates VALUES (?, ?, ?, ?)", rows)
+
+    logging.info(f"В хранилище сохранено курсов валют: {len(rows)}")
+
+
+def save_stock_prices(db_path, stock_prices, timestamp):
+    """Сохраняет цены акций (в формате info_stock_prices) в хранилище на заданный момент времени"""
+    timestamp = normalize_timestamp(timestamp)
+    rows = [(item["stock"], timestamp, item["price"]) for item in stock_prices]
+
+    with closing(connect_market_data(db_path)) as connection, connection:
+        connection.executemany("INSERT OR REPLACE INTO stock_prices VALUES (?, ?, ?)", rows)
+
+    logging.info(f"В хранилище сохранено цен акций: {len(rows)}")
+
+
+def read_export_file(file_path, required_columns):
+    """Читает выгрузку котировок из CSV или Excel-файла и проверяет наличие столбцов"""
+    logging.info(f"Загрузка выгрузки котировок из файла: {file_path}")
+    try:
+        if str(file_path).lower().endswith(".csv"):
+            data = pd.read_csv(file_path)
+        else:
+            data = pd.read_excel(file_path)
+    except FileNotFoundError:
+        logging.error(f"Файл '{file_path}' не найден")
+        raise ValueError(f"Файл '{file_path}' не найден")
+
+    missing_columns = [column for column in required_columns if column not in data.columns]
+    if missing_columns:
+        logging.error(f"В выгрузке отсутствуют столбцы: {', '.join(missing_columns)}")
+        raise ValueError(f"В выгрузке отсутствуют столбцы: {', '.join(missing_columns)}")
+
+    data = data.dropna(subset=required_columns).copy()
+    data["timestamp"] = pd.to_datetime(data["timestamp"], format="mixed").dt.strftime(DATE_TIME_FORMAT)
+    return data
+
+
+def backfill_currency_rates(db_path, file_path):
+    """Массово загружает историю курсов валют из выгрузки.
+
+    Ожидаемые столбцы: timestamp, base_currency, currency, rate (стоимость единицы валюты в базовой валюте)
+    """
+    columns = ["base_currency", "currency", "timestamp", "rate"]
+    data = read_export_file(file_path, columns)
+    rows = data[columns].astype(object).itertuples(index=False, name=None)
+
+    with closing(connect_market_data(db_path)) as connection, connection:
+        connection.executemany("INSERT OR REPLACE INTO currency_rates VALUES (?, ?, ?, ?)", rows)
+
+    logging.info(f"Из файла '{file_path}' загружено курсов валют: {len(data)}")
+    return len(data)
+
+
+def backfill_stock_prices(db_path, file_path):
+    """Массово загружает историю цен акций из выгрузки.
+
+    Ожидаемые столбцы: timestamp, stock, price
+    """
+    columns = ["stock", "timestamp", "price"]
+    data = read_export_file(file_path, columns)
+    rows = data[columns].astype(object).itertuples(index=False, name=None)
+
+    with closing(connect_market_data(db_path)) as connection, connection:
+        connection.executemany("INSERT OR REPLACE INTO stock_prices VALUES (?, ?, ?)", rows)
+
+    logging.info(f"Из файла '{file_path}' загружено цен акций: {len(data)}")
+    return len(data)
+
+
+def currency_rates_as_of(db_path, base_currency, user_currencies, date_time, not_before=None):
+    """Возвращает последние известные на заданный момент курсы валют и список валют без данных.
+
+    Курсы старше not_before считаются отсутствующими
+    """
+    timestamp = normalize_timestamp(date_time)
+    oldest_timestamp = normalize_timestamp(not_before) if not_before is not None else ""
+    currency_rates = []
+    missing_currencies = []
+
+    with closing(connect_market_data(db_path)) as connection, connection:
+        for currency in user_currencies:
+            row = connection.execute(
+                "SELECT rate FROM currency_rates WHERE base_currency = ? AND currency = ? "
+                "AND timestamp <= ? AND timestamp >= ? ORDER BY timestamp DESC LIMIT 1",
+                (base_currency, currency, timestamp, oldest_timestamp),
+            ).fetchone()
+            if row is None:
+                missing_currencies.append(currency)
+            else:
+                currency_rates.append({"currency": currency, "rate": row[0]})
+
+    logging.info(f"Курсов валют на {timestamp} найдено в хранилище: {len(currency_rates)}")
+    return currency_rates, missing_currencies
+
+
+def stock_prices_as_of(db_path, user_stocks, date_time, not_before=None):
+    """Возвращает последние известные на заданный момент цены акций и список акций без данных.
+
+    Цены старше not_before считаются отсутствующими
+    """
+    timestamp = normalize_timestamp(date_time)
+    oldest_timestamp = normalize_timestamp(not_before) if not_before is not None else ""
+    stock_prices = []
+    missing_stocks = []
+
+    with closing(connect_market_data(db_path)) as connection, connection:
+        for stock in user_stocks:
+            row = connection.execute(
+                "SELECT price FROM stock_prices WHERE stock = ? AND timestamp <= ? AND timestamp >= ? "
+                "ORDER BY timestamp DESC LIMIT 1",
+                (stock, timestamp, oldest_timestamp),
+            ).fetchone()
+            if row is None:
+                missing_stocks.append(stock)
+            else:
+                stock_prices.append({"stock": stock, "price": row[0]})
+
+    logging.info(f"Цен акций на {timestamp} найдено в хранилище: {len(stock_prices)}")
+    return stock_prices, missing_stocks
+
+
+def currency_rates_table(db_path, base_currency):
+    """Возвращает всю историю курсов валют к базовой валюте в виде DataFrame"""
+    with closing(connect_market_data(db_path)) as connection, connection:
+        rates_table = pd.read_sql_query(
+            "SELECT timestamp, currency, rate FROM currency_rates WHERE base_currency = ? "
+            "ORDER BY timestamp, currency",
+            connection,
+            params=(base_currency,),
+            parse_dates=["timestamp"],
+        )
+
+    logging.info(f"Из хранилища загружено курсов валют к {base_currency}: {len(rates_table)}")
+    return rates_table
+
+
+def is_past_date(date_time):
+    """Проверяет, что дата отчета раньше сегодняшнего дня (API возвращает только текущие котировки)"""
+    return pd.Timestamp(normalize_timestamp(date_time)).date() < datetime.now().date()
+
+
+def oldest_quote_timestamp(date_time, max_age=MAX_QUOTE_AGE):
+    """Самая ранняя допустимая котировка: для отчета на сегодня - снимок за сегодня, для прошлой даты - max_age"""
+    if not is_past_date(date_time):
+        return datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    return pd.Timestamp(normalize_timestamp(date_time)) - max_age
+
+
+def order_by_user_settings(items, key, user_items):
+    """Упорядочивает котировки как в пользовательских настройках, незапрошенные инструменты - в конце"""
+    positions = {item: number for number, item in enumerate(user_items)}
+    return sorted(items, key=lambda item: positions.get(item[key], len(positions)))
+
+
+def get_currency_rates(db_path, API_KEY_CURRENCY, base_currency, user_currencies, date_time, max_age=MAX_QUOTE_AGE):
+    """Курсы валют: сначала из хранилища, недостающие или устаревшие - через API.
+
+    Для отчета на сегодня подходит только снимок за сегодня, для прошлой даты - не старше max_age.
+    API возвращает только текущие курсы, поэтому они сохраняются в хранилище лишь для отчета на сегодня.
+    Для отчетов за прошлые даты история должна быть загружена заранее (backfill_currency_rates),
+    иначе в отчете используются текущие курсы, а API вызывается при каждом запуске.
+    """
+    currency_rates, missing_currencies = currency_rates_as_of(
+        db_path, base_currency, user_currencies, date_time, oldest_quote_timestamp(date_time, max_age)
+    )
+
+    if missing_currencies:
+        logging.info(f"Запрос недостающих курсов валют через API: {', '.join(missing_currencies)}")
+        fetched_rates = info_currency_rates(API_KEY_CURRENCY, base_currency, missing_currencies)
+        if is_past_date(date_time):
+            logging.warning(
+                f"В хранилище нет актуальных курсов на {date_time}, в отчете использованы текущие курсы: "
+                f"{', '.join(missing_currencies)}"
+            )
+        else:
+            save_currency_rates(db_path, base_currency, fetched_rates, datetime.now())
+        currency_rates.extend(fetched_rates)
+
+    return order_by_user_settings(currency_rates, "currency", user_currencies)
+
+
+def get_stock_prices(db_path, API_KEY_STOCK, user_stocks, date_time, max_age=MAX_QUOTE_AGE):
+    """Цены акций: сначала из хранилища, недостающие или устаревшие - через API.
+
+    Возраст цен ограничивается так же, как у курсов валют. Текущие цены сохраняются в хранилище
+    только для отчета на сегодня, историю для прошлых дат нужно загрузить через backfill_stock_prices.
+    """
+    stock_prices, missing_stocks = stock_prices_as_of(
+        db_path, user_stocks, date_time, oldest_quote_timestamp(date_time, max_age)
+    )
+
+    if missing_stocks:
+        logging.info(f"Запрос недостающих цен акций через API: {', '.join(missing_stocks)}")
+        fetched_prices = info_stock_prices(API_KEY_STOCK, missing_stocks)
+        if is_past_date(date_time):
+            logging.warning(
+                f"В хранилище нет актуальных цен акций на {date_time}, в отчете использованы текущие цены: "
+                f"{', '.join(missing_stocks)}"
+            )
+        else:
+            save_stock_prices(db_path, fetched_prices, datetime.now())
+        stock_prices.extend(fetched_prices)
+
+    return order_by_user_settings(stock_prices, "stock", user_stocks)
@@ -0,0 +1,135 @@
+import logging
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import timedelta
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from src.reports import parse_report_date, report_decorator, spending_by_category
+from src.rollup import report_window_positions
+from src.utils import calculate_card_info, top_transactions
+
+# Настройка логирования
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+
+def split_by_shard_numbers(transactions, shard_numbers, shards):
+    """Делит строки по номерам частей, сохраняя исходный порядок строк внутри каждой части"""
+    order = np.argsort(shard_numbers, kind="stable")
+    bounds = np.searchsorted(shard_numbers[order], np.arange(shards + 1))
+    return [transactions.iloc[order[bounds[number]:bounds[number + 1]]] for number in range(shards)]
+
+
+def partition_by_card(transactions, shards):
+    """Делит транзакции на части по картам: все операции карты попадают в одну часть.
+
+    Карты распределяются по частям непрерывными диапазонами в порядке сортировки номеров,
+    поэтому результаты частей, объединенные по порядку, отсортированы так же, как при groupby.
+    """
+    cards = transactions["Номер карты"]
+    unique_cards = np.sort(cards.dropna().unique())
+    if len(unique_cards) == 0:
+        return [transactions]
+
+    # Номер части для каждой карты, строки без номера карты (код -1) в расчет не попадают
+    shards = min(shards, len(unique_cards))
+    card_shards = np.repeat(np.arange(shards), [len(part) for part in np.array_split(unique_cards, shards)])
+    codes = pd.Categorical(cards, categories=unique_cards).codes
+    shard_numbers = np.where(codes >= 0, card_shards[codes], shards)
+
+    return split_by_shard_numbers(transactions, shard_numbers, shards)
+
+
+def partition_by_position(transactions, shards):
+    """Делит транзакции на части подряд идущих строк, не разбирая даты в родительском процессе"""
+    shards = max(min(shards, len(transactions)), 1)
+    bounds = np.linspace(0, len(transactions), shards + 1).astype(int)
+    return [transactions.iloc[bounds[number]:bounds[number + 1]] for number in range(shards)]
+
+
+def run_partitioned(func, shards, workers, use_threads=False):
+    """Выполняет функцию для каждой части в пуле процессов (или потоков) и возвращает результаты по порядку"""
+    if workers <= 1 or len(shards) <= 1:
+        return [func(shard) for shard in shards]
+
+    executor_class = ThreadPoolExecutor if use_threads else ProcessPoolExecutor
+    with executor_class(max_workers=workers) as executor:
+        return list(executor.map(func, shards))
+
+
+def calculate_card_info_parallel(transactions, workers=4, amount_column="Сумма операции", use_threads=False):
+    """Вычисляет информацию по картам параллельно по частям, разделенным по картам"""
+    logging.info(f"Параллельное вычисление информации по картам, процессов: {workers}")
+    if "Номер карты" not in transactions.columns or amount_column not in transactions.columns:
+        logging.error("Необходимые столбцы отсутствуют в данных транзакций")
+        raise ValueError("Необходимые столбцы отсутствуют в данных транзакций")
+
+    if workers <= 1:
+        return calculate_card_info(transactions, amount_column)
+
+    shards = partition_by_card(transactions, workers)
+    results = run_partitioned(partial(calculate_card_info, amount_column=amount_column), shards, workers, use_threads)
+
+    return [card for result in results for card in result]
+
+
+def top_transactions_shard(shard, amount_column, limit):
+    """Возвращает кандидатов в топ из одной части (строки с исходными индексами)"""
+    return shard.sort_values(by=amount_column, ascending=False, kind="stable").head(limit)
+
+
+def top_transactions_parallel(transactions, workers=4, amount_column="Сумма платежа", use_threads=False):
+    """Ищет топ-5 транзакций: топ каждой части подряд идущих строк, затем общий топ среди кандидатов"""
+    logging.info(f"Параллельное определение топ-5 транзакций, процессов: {workers}")
+    if "Дата операции" not in transactions.columns or amount_column not in transactions.columns:
+        logging.error("В транзакциях DataFrame отсутствуют требуемые столбцы")
+        raise ValueError("В транзакциях DataFrame отсутствуют требуемые столбцы")
+
+    if workers <= 1:
+        return top_transactions(transactions.copy(), amount_column)
+
+    # Строки нумеруются по порядку, чтобы после объединения восстановить исходный порядок.
+    # Даты для топа не нужны, поэтому разбираются только у кандидатов в общем топе
+    shards = partition_by_position(transactions.reset_index(drop=True), workers)
+    results = run_partitioned(
+        partial(top_transactions_shard, amount_column=amount_column, limit=5), shards, workers, use_threads
+    )
+
+    # Кандидаты в исходном порядке строк, чтобы при равных суммах порядок совпадал с последовательным расчетом
+    candidates = pd.concat(results).sort_index()
+    return top_transactions(candidates, amount_column)
+
+
+def spending_by_category_shard(shard, category, date):
+    """Траты по категории для одной части без записи отчета в файл (даты части разбираются в процессе пула)"""
+    return spending_by_category.__wrapped__(shard.copy(), category, date)
+
+
+@report_decorator()
+def spending_by_category_parallel(transactions, category, date, workers=4, use_threads=False, rollup=None):
+    """Возвращает траты по категории за последние три месяца, обрабатывая части подряд идущих строк параллельно.
+
+    Если переданы итоги (rollup), сначала двоичным поиском выбираются строки окна, и делится только окно.
+    """
+    logging.info(f"Параллельный отбор трат по категории '{category}', процессов: {workers}")
+
+    if workers <= 1:
+        return spending_by_category.__wrapped__(transactions.copy(), category, date, rollup)
+
+    if rollup is not None:
+        report_date = parse_report_date(date)
+        transactions = transactions.iloc[
+            report_window_positions(rollup, transactions, report_date - timedelta(days=90), report_date)
+        ]
+
+    # Строки нумеруются по порядку, чтобы после объединения восстановить исходный порядок и индекс.
+    # Каждая часть сама разбирает свои даты, поэтому в родительском процессе даты не разбираются
+    shards = partition_by_position(transactions.reset_index(drop=True), workers)
+    results = run_partitioned(
+        partial(spending_by_category_shard, category=category, date=date), shards, workers, use_threads
+    )
+
+    filtered_transactions = pd.concat(results).sort_index()
+    filtered_transactions.index = transactions.index[filtered_transactions.index]
+    return filtered_transactions
@@ -2,8 +2,11 @@ import functools
 import logging
 from datetime import datetime, timedelta
 
+import numpy as np
 import pandas as pd
 
+from src.rollup import report_window_positions, unparsed_positions, window_from_rollup
+
 # Настройка логирования
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
@@ -32,9 +35,8 @@ def report_decorator(file_name=None):
     return decorator
 
 
-@report_decorator()
-def spending_by_category(transactions, category, date):
-    """Возвращает траты по категории за последние три месяца от заданной даты"""
+def parse_report_date(date):
+    """Приводит дату отчета к datetime (по умолчанию - текущая дата)"""
 
     # Преобразование строки даты в объект datetime
     if date is not None:
@@ -54,6 +56,21 @@ def spending_by_category(transactions, category, date):
         date = datetime.today()
 
     logging.info("Используемая дата: %s", date)
+    return date
+
+
+@report_decorator()
+def spending_by_category(transactions, category, date, rollup=None):
+    """Возвращает траты по категории за последние три месяца от заданной даты"""
+
+    date = parse_report_date(date)
+
+    if rollup is not None:
+        # Строки окна выбираются двоичным поиском по упорядоченным датам из итогов, без просмотра всех строк;
+        # строки, дату которых итоги не разобрали, разбираются так же, как ниже
+        transactions = transactions.iloc[
+            report_window_positions(rollup, transactions, date - timedelta(days=90), date)
+        ].copy()
 
     # Приведение "Дата операции" к datetime
     transactions["Дата операции"] = pd.to_datetime(transactions["Дата операции"], format="mixed", dayfirst=True)
@@ -73,3 +90,34 @@ def spending_by_category(transactions, category, date):
 
     # Возвращение DataFrame с транзакциями по категории за последние три месяца
     return filtered_by_date
+
+
+@report_decorator()
+def spending_by_category_total(transactions, category, date, rollup):
+    """Возвращает сумму и количество трат по категории за последние три месяца по итогам"""
+
+    date = parse_report_date(date)
+    start_date = date - timedelta(days=90)
+
+    # Полные дни окна - из итогов, неполные дни на краях окна - из сырых строк
+    full_cells, positions, _, _ = window_from_rollup(rollup, transactions, start_date, date)
+    full_cells = full_cells[full_cells["category"] == category]
+    # Строки, дату которых итоги не разобрали, учитываются так же, как в spending_by_category
+    positions = np.concatenate([positions, unparsed_positions(rollup, transactions, start_date, date)])
+    edge_rows = transactions.iloc[positions]
+    edge_rows = edge_rows[edge_rows["Категория"] == category]
+
+    total = full_cells["Сумма операции"].sum() + edge_rows["Сумма операции"].sum()
+    count = full_cells["count"].sum() + len(edge_rows)
+
+    logging.info("Траты в категории '%s' за последние три месяца: %s (%d операций)", category, total, count)
+
+    return pd.DataFrame(
+        {
+            "Категория": [category],
+            "Начало периода": [start_date],
+            "Конец периода": [date],
+            "Сумма операций": [round(total, 2)],
+            "Количество операций": [int(count)],
+        }
+    )
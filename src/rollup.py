@@ -0,0 +1,282 @@
+import hashlib
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.utils import BASE_CURRENCY_COLUMNS, top_transactions
+
+# Настройка логирования
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+# Измерения итогов и суммы, которые по ним накапливаются
+ROLLUP_KEYS = ["month", "day", "card", "category"]
+AMOUNT_COLUMNS = ["Сумма операции", "Сумма платежа"] + [column for _, column in BASE_CURRENCY_COLUMNS.values()]
+PAYMENT_COLUMNS = ["Сумма платежа", BASE_CURRENCY_COLUMNS["Сумма платежа"][1]]
+TOP_K = 5
+# Версия формата файла итогов: при изменении состава итогов старые файлы перестраиваются
+ROLLUP_VERSION = 3
+# Количество строк, по датам и индексу которых проверяется, что итоги построены по тем же транзакциям
+FINGERPRINT_SAMPLE = 64
+
+
+def operation_dates(transactions):
+    """Преобразует 'Дата операции' в datetime так же, как filter_transactions_by_date"""
+    return pd.to_datetime(transactions["Дата операции"], format="%d.%m.%Y %H:%M:%S", errors="coerce")
+
+
+def transactions_fingerprint(transactions):
+    """Дешевый отпечаток транзакций: количество строк, индекс и даты операции в равномерной выборке строк"""
+    positions = np.linspace(0, len(transactions) - 1, num=min(len(transactions), FINGERPRINT_SAMPLE)).astype(int)
+    sample = transactions.iloc[positions]
+    dates = pd.to_datetime(sample["Дата операции"], format="mixed", dayfirst=True, errors="coerce")
+    key = repr((len(transactions), sample.index.tolist(), dates.astype(str).tolist()))
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def check_rollup(rollup, transactions):
+    """Проверяет, что итоги построены по переданным транзакциям: итоги хранят номера строк"""
+    if rollup.get("rows") != len(transactions) or rollup.get("fingerprint") != transactions_fingerprint(transactions):
+        logging.error("Итоги построены по другим данным транзакций")
+        raise ValueError("Итоги построены по другим данным транзакций")
+
+
+def build_rollup(transactions, top_k=TOP_K):
+    """Строит итоги по (месяц, день, карта, категория): суммы, количество и топ-K платежей в каждой ячейке"""
+    logging.info(f"Построение итогов по {len(transactions)} транзакциям")
+    if "Номер карты" not in transactions.columns or "Категория" not in transactions.columns:
+        logging.error("Необходимые столбцы отсутствуют в данных транзакций")
+        raise ValueError("Необходимые столбцы отсутствуют в данных транзакций")
+
+    dates = operation_dates(transactions)
+    amount_columns = [column for column in AMOUNT_COLUMNS if column in transactions.columns]
+
+    frame = pd.DataFrame(
+        {
+            "month": dates.dt.strftime("%Y-%m").to_numpy(),
+            "day": dates.dt.normalize().to_numpy(),
+            "card": transactions["Номер карты"].to_numpy(),
+            "category": transactions["Категория"].astype(object).to_numpy(),
+            "position": np.arange(len(transactions)),
+            "Дата операции": dates.to_numpy(),
+            "Описание": transactions["Описание"].to_numpy() if "Описание" in transactions.columns else None,
+        }
+    )
+    for column in amount_columns:
+        frame[column] = transactions[column].to_numpy()
+    frame = frame[frame["day"].notna()]
+
+    # Суммы и количество операций в каждой ячейке
+    cells = (
+        frame.groupby(ROLLUP_KEYS, dropna=False, sort=True)
+        .agg(count=("position", "size"), **{column: (column, "sum") for column in amount_columns})
+        .reset_index()
+    )
+
+    # Топ-K платежей ячейки (при равных суммах - в исходном порядке строк)
+    top = {}
+    for column in PAYMENT_COLUMNS:
+        if column in amount_columns:
+            sorted_frame = frame.sort_values(by=column, ascending=False, kind="stable")
+            top[column] = (
+                sorted_frame.groupby(ROLLUP_KEYS, dropna=False, sort=False)
+                .head(top_k)
+                .loc[:, ["day", "position", "Дата операции", column, "category", "Описание"]]
+                .rename(columns={"category": "Категория"})
+                .sort_values(by="position")
+                .reset_index(drop=True)
+            )
+
+    # Номера строк в порядке даты операции - для выборки сырых строк на краях окна двоичным поиском
+    order = frame["position"].to_numpy()[np.argsort(frame["Дата операции"].to_numpy(), kind="stable")]
+
+    logging.info(f"Итоги построены: ячеек {len(cells)}")
+    return {
+        "cells": cells,
+        "top": top,
+        "dates": dates.to_numpy()[order],
+        "order": order,
+        "columns": amount_columns,
+        "rows": len(transactions),
+        "fingerprint": transactions_fingerprint(transactions),
+        "top_k": top_k,
+        # Строки, дата которых не разобрана строгим форматом: отчеты разбирают их сами (unparsed_positions)
+        "unparsed": np.flatnonzero(dates.isna().to_numpy()),
+        "version": ROLLUP_VERSION,
+    }
+
+
+def rollup_path(file_path):
+    """Путь к файлу итогов рядом с файлом данных"""
+    return f"{os.path.splitext(file_path)[0]}.rollup.pkl"
+
+
+def rates_fingerprint(rates_table):
+    """Отпечаток таблицы курсов: итоги по суммам в базовой валюте устаревают при изменении курсов"""
+    if rates_table is None:
+        return None
+    hashes = pd.util.hash_pandas_object(rates_table.loc[:, ["timestamp", "currency", "rate"]], index=False)
+    return hashlib.sha256(hashes.to_numpy().tobytes()).hexdigest()
+
+
+def load_rollup(file_path, transactions, top_k=TOP_K, rates_table=None):
+    """Загружает итоги из файла рядом с данными или строит и сохраняет их, если файл устарел.
+
+    rates_table - таблица курсов, по которой суммы пересчитаны в базовую валюту (convert_to_base_currency)
+    """
+    try:
+        source_mtime = os.path.getmtime(file_path)
+    except FileNotFoundError:
+        logging.error(f"Файл '{file_path}' не найден")
+        raise ValueError(f"Файл '{file_path}' не найден")
+
+    path = rollup_path(file_path)
+    amount_columns = [column for column in AMOUNT_COLUMNS if column in transactions.columns]
+    fingerprint = rates_fingerprint(rates_table)
+    if fingerprint is None and any(base_column in amount_columns for _, base_column in BASE_CURRENCY_COLUMNS.values()):
+        logging.warning("Суммы в базовой валюте есть, но таблица курсов не передана: изменение курсов не отследить")
+
+    if os.path.exists(path):
+        rollup = pd.read_pickle(path)
+        if (
+            rollup.get("source_mtime") == source_mtime
+            and rollup.get("columns") == amount_columns
+            and rollup.get("rows") == len(transactions)
+            and rollup.get("fingerprint") == transactions_fingerprint(transactions)
+            and rollup.get("top_k") == top_k
+            and rollup.get("rates_fingerprint") == fingerprint
+            and rollup.get("version") == ROLLUP_VERSION
+        ):
+            logging.info(f"Итоги загружены из файла: {path}")
+            return rollup
+        logging.info(f"Файл итогов устарел: {path}")
+
+    rollup = build_rollup(transactions, top_k)
+    rollup["source_mtime"] = source_mtime
+    rollup["rates_fingerprint"] = fingerprint
+    pd.to_pickle(rollup, path)
+
+    logging.info(f"Итоги сохранены в файл: {path}")
+    return rollup
+
+
+def window_positions(rollup, start, end):
+    """Номера строк с датой операции в интервале [start, end] в исходном порядке (двоичный поиск)"""
+    left = np.searchsorted(rollup["dates"], np.datetime64(start), side="left")
+    right = np.searchsorted(rollup["dates"], np.datetime64(end), side="right")
+    return np.sort(rollup["order"][left:right])
+
+
+def unparsed_positions(rollup, transactions, start, end):
+    """Номера строк, дату которых итоги не разобрали, но которые попадают в окно [start, end]
+    при разборе как в spending_by_category (format="mixed", dayfirst=True)"""
+    positions = rollup["unparsed"]
+    if len(positions) == 0:
+        return positions
+
+    dates = pd.to_datetime(transactions["Дата операции"].iloc[positions], format="mixed", dayfirst=True)
+    return positions[((dates >= start) & (dates <= end)).to_numpy()]
+
+
+def report_window_positions(rollup, transactions, start, end):
+    """Номера строк окна для отчетов по всем строкам: найденные по датам итогов и не разобранные итогами"""
+    check_rollup(rollup, transactions)
+    positions = [window_positions(rollup, start, end), unparsed_positions(rollup, transactions, start, end)]
+    return np.sort(np.concatenate(positions))
+
+
+def split_window(start, end):
+    """Делит окно [start, end] на полные дни [first_day, last_day) и неполные дни на краях"""
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    first_day = start if start == start.normalize() else start.normalize() + pd.Timedelta(days=1)
+    last_day = end.normalize()
+
+    if first_day > last_day:
+        return first_day, first_day, [(start, end)]
+
+    edges = [(last_day, end)]
+    if start < first_day:
+        edges.insert(0, (start, first_day - pd.Timedelta(nanoseconds=1)))
+    return first_day, last_day, edges
+
+
+def window_from_rollup(rollup, transactions, start, end):
+    """Возвращает ячейки итогов за полные дни окна и сырые строки за неполные дни на его краях"""
+    check_rollup(rollup, transactions)
+    first_day, last_day, edges = split_window(start, end)
+
+    cells = rollup["cells"]
+    full_cells = cells[(cells["day"] >= first_day) & (cells["day"] < last_day)]
+    positions = np.concatenate([window_positions(rollup, edge_start, edge_end) for edge_start, edge_end in edges])
+
+    logging.info(f"Окно {start} - {end}: ячеек итогов {len(full_cells)}, сырых строк {len(positions)}")
+    return full_cells, positions, first_day, last_day
+
+
+def month_to_date(date_time_str):
+    """Возвращает начало месяца и заданную дату, как filter_transactions_by_date"""
+    try:
+        end_date = pd.Timestamp(pd.to_datetime(date_time_str, format="%Y-%m-%d %H:%M:%S"))
+    except ValueError:
+        logging.error(f"Некорректный формат даты и времени: {date_time_str}")
+        raise ValueError("Некорректный формат даты и времени")
+    return end_date.replace(day=1, hour=0, minute=0, second=0), end_date
+
+
+def calculate_card_info_from_rollup(rollup, transactions, date_time_str, amount_column="Сумма операции"):
+    """Вычисляет информацию по картам с начала месяца по итогам и сырым строкам неполного дня"""
+    logging.info("Вычисление информации по картам по итогам")
+    if amount_column not in rollup["columns"]:
+        logging.error("Необходимые столбцы отсутствуют в данных транзакций")
+        raise ValueError("Необходимые столбцы отсутствуют в данных транзакций")
+
+    start_date, end_date = month_to_date(date_time_str)
+    full_cells, positions, _, _ = window_from_rollup(rollup, transactions, start_date, end_date)
+    edge_rows = transactions.iloc[positions]
+
+    totals = pd.concat(
+        [
+            full_cells.loc[:, ["card", amount_column]],
+            pd.DataFrame(
+                {"card": edge_rows["Номер карты"].to_numpy(), amount_column: edge_rows[amount_column].to_numpy()}
+            ),
+        ]
+    )
+    totals = totals.groupby("card")[amount_column].sum().round(2)
+
+    cards_data = [
+        {"last_digits": str(card)[-4:], "total_spent": float(total), "cashback": round(float(total) * 0.01, 2)}
+        for card, total in totals.items()
+    ]
+
+    logging.info("Информация по картам успешно вычислена")
+    return cards_data
+
+
+def top_transactions_from_rollup(rollup, transactions, date_time_str, amount_column="Сумма платежа"):
+    """Ищет топ-5 транзакций с начала месяца среди топов ячеек и сырых строк неполного дня"""
+    logging.info("Определение топ-5 транзакций по итогам")
+    if amount_column not in rollup["top"]:
+        logging.error("В транзакциях DataFrame отсутствуют требуемые столбцы")
+        raise ValueError("В транзакциях DataFrame отсутствуют требуемые столбцы")
+
+    start_date, end_date = month_to_date(date_time_str)
+    _, positions, first_day, last_day = window_from_rollup(rollup, transactions, start_date, end_date)
+
+    top = rollup["top"][amount_column]
+    full_candidates = top[(top["day"] >= first_day) & (top["day"] < last_day)]
+    edge_rows = transactions.iloc[positions]
+    edge_candidates = pd.DataFrame(
+        {
+            "position": positions,
+            "Дата операции": operation_dates(edge_rows).to_numpy(),
+            amount_column: edge_rows[amount_column].to_numpy(),
+            "Категория": edge_rows["Категория"].to_numpy(),
+            "Описание": edge_rows["Описание"].to_numpy(),
+        }
+    )
+
+    # Кандидаты в исходном порядке строк, чтобы при равных суммах порядок совпадал с расчетом по всем строкам
+    candidates = pd.concat([full_candidates.drop(columns="day"), edge_candidates]).sort_values(by="position")
+    return top_transactions(candidates.reset_index(drop=True), amount_column)
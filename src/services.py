@@ -1,9 +1,24 @@
 import json
 import logging
+import re
+
+import numpy as np
+import pandas as pd
 
 # Настройка логирования
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
+# Слово - последовательность букв (кириллица и латиница) и цифр
+TOKEN_PATTERN = re.compile(r"\w+")
+
+# Вес совпадения слова запроса со словом из описания
+EXACT_MATCH_WEIGHT = 1.0
+PREFIX_MATCH_WEIGHT = 0.8
+TYPO_PENALTY = 0.3
+# Минимальный вес совпадения с опечатками: при большом max_typos вес не должен стать нулевым или отрицательным
+MIN_TYPO_WEIGHT = 0.1
+
+
 def dataframe_to_dict_with_str(df):
     """Преобразует DataFrame в список словарей"""
     result = []
@@ -23,14 +38,20 @@ def search_transactions(transactions, query):
     logging.info("Начало выполнения функции search_transactions")
     logging.debug("Поисковый запрос: %s", query)
 
+    # Описания повторяются, поэтому каждая уникальная строка приводится к нижнему регистру один раз
+    query_lower = query.lower()
+    text_matches = {}
+
+    def matches_query(text):
+        if text not in text_matches:
+            text_matches[text] = query_lower in text.lower()
+        return text_matches[text]
+
     matching_transactions = [
         transaction
         for transaction in transactions
         if isinstance(transaction, dict)
-        and (
-            query.lower() in transaction.get("Описание", "").lower()
-            or query.lower() in transaction.get("Категория", "").lower()
-        )
+        and (matches_query(transaction.get("Описание", "")) or matches_query(transaction.get("Категория", "")))
     ]
 
     logging.info("Найдено %d подходящих транзакций", len(matching_transactions))
@@ -41,3 +62,171 @@ def search_transactions(transactions, query):
     logging.info("Завершение выполнения функции search_transactions")
 
     return json_response
+
+
+def search_transactions_dataframe(transactions, query):
+    """Ищет транзакции по поисковому запросу в DataFrame, проверяя каждое уникальное описание один раз"""
+
+    logging.info("Начало выполнения функции search_transactions_dataframe")
+    logging.debug("Поисковый запрос: %s", query)
+
+    mask = np.zeros(len(transactions), dtype=bool)
+    for column in ("Описание", "Категория"):
+        if column not in transactions.columns:
+            continue
+        # Словарь уникальных строк и коды строк (уже построены, если данные закодированы encode_descriptions)
+        values = transactions[column]
+        if not isinstance(values.dtype, pd.CategoricalDtype):
+            values = values.astype("category")
+        categories = values.cat.categories.astype(str).str.lower()
+        matched_codes = np.flatnonzero(categories.str.contains(query.lower(), regex=False))
+        codes = values.cat.codes.to_numpy()
+        mask |= np.isin(codes, matched_codes)
+
+        # Пропуски не входят в словарь (код -1), а search_transactions сравнивает их строкой ('nan', 'None')
+        missing = np.flatnonzero(codes == -1)
+        if len(missing):
+            missing_texts = transactions[column].iloc[missing].map(lambda value: str(value).lower())
+            mask[missing] |= missing_texts.str.contains(query.lower(), regex=False).to_numpy()
+
+    matching_transactions = dataframe_to_dict_with_str(transactions[mask])
+
+    logging.info("Найдено %d подходящих транзакций", len(matching_transactions))
+
+    json_response = json.dumps(matching_transactions, ensure_ascii=False)
+
+    logging.info("Завершение выполнения функции search_transactions_dataframe")
+
+    return json_response
+
+
+def tokenize(text):
+    """Разбивает строку на слова в нижнем регистре, буква 'ё' приравнивается к 'е'"""
+    return TOKEN_PATTERN.findall(str(text).lower().replace("ё", "е"))
+
+
+def bounded_edit_distance(first, second, max_distance):
+    """Расстояние Левенштейна между строками или max_distance + 1, если оно больше max_distance"""
+    if abs(len(first) - len(second)) > max_distance:
+        return max_distance + 1
+
+    previous_row = list(range(len(second) + 1))
+    for i, first_char in enumerate(first, start=1):
+        current_row = [i]
+        for j, second_char in enumerate(second, start=1):
+            current_row.append(
+                min(
+                    previous_row[j] + 1,
+                    current_row[j - 1] + 1,
+                    previous_row[j - 1] + (first_char != second_char),
+                )
+            )
+        # Расстояние не может уменьшиться, если вся строка таблицы уже больше порога
+        if min(current_row) > max_distance:
+            return max_distance + 1
+        previous_row = current_row
+
+    return min(previous_row[-1], max_distance + 1)
+
+
+def build_search_index(transactions):
+    """Строит индекс по уникальным описаниям и категориям транзакций"""
+    logging.info("Построение поискового индекса по %d транзакциям", len(transactions))
+
+    text_ids = {}
+    text_rows = []
+    token_texts = {}
+
+    for row, transaction in enumerate(transactions):
+        if not isinstance(transaction, dict):
+            continue
+        for field in ("Описание", "Категория"):
+            text = transaction.get(field, "")
+            if text not in text_ids:
+                text_ids[text] = len(text_rows)
+                text_rows.append([])
+                for token in tokenize(text):
+                    token_texts.setdefault(token, set()).add(text_ids[text])
+            text_rows[text_ids[text]].append(row)
+
+    # Слова сгруппированы по длине, чтобы при поиске с опечатками проверять только близкие по длине
+    tokens_by_length = {}
+    for token in token_texts:
+        tokens_by_length.setdefault(len(token), []).append(token)
+
+    logging.info("В индексе %d уникальных строк и %d слов", len(text_rows), len(token_texts))
+    return {"text_rows": text_rows, "token_texts": token_texts, "tokens_by_length": tokens_by_length}
+
+
+def match_term(index, term, max_typos):
+    """Возвращает веса совпадения слова запроса для строк индекса"""
+    # Для коротких слов опечатки не допускаются, иначе совпадет слишком многое
+    allowed_typos = min(max_typos, max(len(term) - 1, 0) // 3)
+    text_weights = {}
+
+    for length in range(len(term) - allowed_typos, max(index["tokens_by_length"], default=0) + 1):
+        for token in index["tokens_by_length"].get(length, []):
+            if token == term:
+                weight = EXACT_MATCH_WEIGHT
+            elif len(term) >= 3 and token.startswith(term):
+                weight = PREFIX_MATCH_WEIGHT
+            elif length <= len(term) + allowed_typos:
+                distance = bounded_edit_distance(term, token, allowed_typos)
+                if distance > allowed_typos:
+                    continue
+                weight = max(EXACT_MATCH_WEIGHT - TYPO_PENALTY * distance, MIN_TYPO_WEIGHT)
+            else:
+                continue
+            for text_id in index["token_texts"][token]:
+                text_weights[text_id] = max(text_weights.get(text_id, 0.0), weight)
+
+    return text_weights
+
+
+def search_transactions_ranked(transactions, query, mode="and", max_typos=1, limit=20, offset=0, index=None):
+    """Ищет транзакции по словам запроса с учетом опечаток и возвращает страницу результатов по релевантности"""
+
+    logging.info("Начало выполнения функции search_transactions_ranked")
+    logging.debug("Поисковый запрос: %s, режим: %s", query, mode)
+
+    if mode not in ("and", "or"):
+        logging.error("Режим поиска должен быть 'and' или 'or'")
+        raise ValueError("Режим поиска должен быть 'and' или 'or'")
+    if limit < 0 or offset < 0:
+        logging.error("limit и offset должны быть неотрицательными")
+        raise ValueError("limit и offset должны быть неотрицательными")
+    if max_typos < 0:
+        logging.error("max_typos должен быть неотрицательным")
+        raise ValueError("max_typos должен быть неотрицательным")
+
+    if index is None:
+        index = build_search_index(transactions)
+
+    terms = list(dict.fromkeys(tokenize(query)))
+
+    # Для каждой транзакции - лучший вес каждого слова запроса по описанию и категории
+    row_weights = {}
+    for term_number, term in enumerate(terms):
+        for text_id, weight in match_term(index, term, max_typos).items():
+            for row in index["text_rows"][text_id]:
+                weights = row_weights.setdefault(row, [0.0] * len(terms))
+                weights[term_number] = max(weights[term_number], weight)
+
+    if mode == "and":
+        scored_rows = [(sum(weights), row) for row, weights in row_weights.items() if all(weights)]
+    else:
+        scored_rows = [(sum(weights), row) for row, weights in row_weights.items()]
+
+    # Сортировка по убыванию релевантности, при равной релевантности - в исходном порядке
+    scored_rows.sort(key=lambda item: (-item[0], item[1]))
+    page = [transactions[row] for score, row in scored_rows[offset:offset + limit]]
+
+    logging.info("Найдено %d подходящих транзакций, возвращено %d", len(scored_rows), len(page))
+
+    json_response = json.dumps(
+        {"total": len(scored_rows), "offset": offset, "limit": limit, "transactions": page}, ensure_ascii=False
+    )
+
+    logging.info("Завершение выполнения функции search_transactions_ranked")
+
+    return json_response
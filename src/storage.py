@@ -0,0 +1,212 @@
+import logging
+import sqlite3
+from contextlib import closing
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from src.reports import parse_report_date, report_decorator
+
+# Настройка логирования
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+DATE_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Соответствие столбцов Excel-файла столбцам таблицы transactions
+TRANSACTION_COLUMNS = {
+    "Дата операции": "operation_date",
+    "Дата платежа": "payment_date",
+    "Номер карты": "card_number",
+    "Статус": "status",
+    "Сумма операции": "operation_amount",
+    "Валюта операции": "operation_currency",
+    "Сумма платежа": "payment_amount",
+    "Валюта платежа": "payment_currency",
+    "Кэшбэк": "cashback",
+    "Категория": "category",
+    "MCC": "mcc",
+    "Описание": "description",
+    "Бонусы (включая кэшбэк)": "bonuses",
+    "Округление на инвесткопилку": "investment_rounding",
+    "Сумма операции с округлением": "rounded_operation_amount",
+    "Сумма операции в базовой валюте": "operation_amount_base",
+    "Сумма платежа в базовой валюте": "payment_amount_base",
+}
+
+
+def connect_transactions(db_path):
+    """Открывает базу транзакций и создает таблицу и индексы при необходимости"""
+    logging.info(f"Подключение к базе транзакций: {db_path}")
+    connection = sqlite3.connect(db_path)
+    connection.executescript(
+        """
+        CREATE TABLE IF NOT EXISTS transactions (
+            operation_date TEXT,
+            payment_date TEXT,
+            card_number TEXT,
+            status TEXT,
+            operation_amount REAL,
+            operation_currency TEXT,
+            payment_amount REAL,
+            payment_currency TEXT,
+            cashback REAL,
+            category TEXT,
+            mcc REAL,
+            description TEXT,
+            bonuses REAL,
+            investment_rounding REAL,
+            rounded_operation_amount REAL,
+            operation_amount_base REAL,
+            payment_amount_base REAL
+        );
+        CREATE TABLE IF NOT EXISTS transaction_columns (
+            position INTEGER PRIMARY KEY,
+            name TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_transactions_date ON transactions (operation_date);
+        CREATE INDEX IF NOT EXISTS idx_transactions_category_date ON transactions (category, operation_date);
+        CREATE INDEX IF NOT EXISTS idx_transactions_card_date ON transactions (card_number, operation_date);
+        """
+    )
+    return connection
+
+
+def save_transactions_to_db(transactions, db_path):
+    """Сохраняет транзакции из DataFrame в базу SQLite, заменяя ранее сохраненные"""
+    logging.info(f"Сохранение транзакций в базу: {db_path}")
+
+    columns = [column for column in transactions.columns if column in TRANSACTION_COLUMNS]
+    normalized = transactions.loc[:, columns].rename(columns=TRANSACTION_COLUMNS)
+
+    # Дата операции разбирается так же, как в spending_by_category, и хранится строкой ISO,
+    # чтобы сравнение строк совпадало со сравнением дат. "Дата платежа" хранится как есть
+    operation_dates = pd.to_datetime(normalized["operation_date"], format="mixed", dayfirst=True, errors="coerce")
+    unparsed = operation_dates.isna() & normalized["operation_date"].notna()
+    if unparsed.any():
+        logging.error(f"Некорректный формат даты операции в {unparsed.sum()} транзакциях")
+        raise ValueError(f"Некорректный формат даты операции в {unparsed.sum()} транзакциях")
+    normalized["operation_date"] = operation_dates.dt.strftime(DATE_TIME_FORMAT)
+
+    with closing(connect_transactions(db_path)) as connection, connection:
+        connection.execute("DELETE FROM transactions")
+        connection.execute("DELETE FROM transaction_columns")
+        normalized.to_sql("transactions", connection, if_exists="append", index=False, chunksize=10000)
+        # Сохраненные столбцы в исходном порядке - выборки возвращают только их
+        connection.executemany("INSERT INTO transaction_columns VALUES (?, ?)", enumerate(normalized.columns))
+
+    logging.info(f"В базу сохранено транзакций: {len(normalized)}")
+    return len(normalized)
+
+
+def query_transactions(db_path, query, params=()):
+    """Выполняет запрос к базе транзакций и возвращает результат в виде DataFrame"""
+    with closing(connect_transactions(db_path)) as connection, connection:
+        return pd.read_sql_query(query, connection, params=params)
+
+
+def select_transactions(db_path, condition, params=()):
+    """Выбирает транзакции по условию и возвращает DataFrame со столбцами как в Excel-файле"""
+    stored_columns = query_transactions(db_path, "SELECT name FROM transaction_columns ORDER BY position")["name"]
+    selected_columns = ", ".join(stored_columns) if len(stored_columns) else "*"
+    transactions = query_transactions(
+        db_path, f"SELECT {selected_columns} FROM transactions WHERE {condition} ORDER BY rowid", params
+    )
+
+    reverse_columns = {name: column for column, name in TRANSACTION_COLUMNS.items()}
+    transactions = transactions.rename(columns=reverse_columns)
+    transactions["Дата операции"] = pd.to_datetime(transactions["Дата операции"], format=DATE_TIME_FORMAT)
+    return transactions
+
+
+def month_to_date_window(date_time_str):
+    """Возвращает начало месяца и заданную дату в виде строк для запросов к базе"""
+    try:
+        end_date = datetime.strptime(date_time_str, DATE_TIME_FORMAT)
+    except ValueError:
+        logging.error(f"Некорректный формат даты и времени: {date_time_str}")
+        raise ValueError("Некорректный формат даты и времени")
+    start_date = end_date.replace(day=1, hour=0, minute=0, second=0)
+    return start_date.strftime(DATE_TIME_FORMAT), end_date.strftime(DATE_TIME_FORMAT)
+
+
+def has_base_currency_amounts(db_path):
+    """Проверяет, сохранены ли в базе суммы в базовой валюте"""
+    with closing(connect_transactions(db_path)) as connection, connection:
+        row = connection.execute(
+            "SELECT 1 FROM transactions WHERE operation_amount_base IS NOT NULL LIMIT 1"
+        ).fetchone()
+    return row is not None
+
+
+def filter_transactions_by_date_db(db_path, date_time_str):
+    """Возвращает транзакции с начала месяца по заданную дату, фильтруя их в базе"""
+    start_date, end_date = month_to_date_window(date_time_str)
+
+    transactions = select_transactions(db_path, "operation_date BETWEEN ? AND ?", (start_date, end_date))
+
+    logging.info(f"Найдено {len(transactions)} транзакций с {start_date} по {end_date}")
+    return transactions
+
+
+def calculate_card_info_db(db_path, date_time_str, amount_column="Сумма операции"):
+    """Вычисляет информацию по картам с начала месяца, агрегируя суммы в базе"""
+    logging.info("Вычисление информации по картам в базе")
+    start_date, end_date = month_to_date_window(date_time_str)
+
+    if amount_column not in TRANSACTION_COLUMNS:
+        logging.error("В базе транзакций отсутствуют требуемые столбцы")
+        raise ValueError("В базе транзакций отсутствуют требуемые столбцы")
+
+    card_info = query_transactions(
+        db_path,
+        f"SELECT card_number, SUM({TRANSACTION_COLUMNS[amount_column]}) AS total_spent FROM transactions "
+        "WHERE operation_date BETWEEN ? AND ? AND card_number IS NOT NULL "
+        "GROUP BY card_number ORDER BY card_number",
+        (start_date, end_date),
+    )
+
+    cards_data = [
+        {"last_digits": str(card)[-4:], "total_spent": total, "cashback": round(total * 0.01, 2)}
+        for card, total in zip(card_info["card_number"], card_info["total_spent"])
+    ]
+
+    logging.info("Информация по картам успешно вычислена")
+    return cards_data
+
+
+def top_transactions_db(db_path, date_time_str, amount_column="Сумма платежа", limit=5):
+    """Возвращает топ транзакций с начала месяца, сортируя и ограничивая выборку в базе"""
+    logging.info(f"Определение топ-{limit} транзакций по сумме платежа в базе")
+    start_date, end_date = month_to_date_window(date_time_str)
+
+    if amount_column not in TRANSACTION_COLUMNS:
+        logging.error("В базе транзакций отсутствуют требуемые столбцы")
+        raise ValueError("В базе транзакций отсутствуют требуемые столбцы")
+
+    amount = TRANSACTION_COLUMNS[amount_column]
+    top = query_transactions(
+        db_path,
+        f"SELECT strftime('%d.%m.%Y', operation_date) AS date, {amount} AS amount, "
+        "category, description FROM transactions WHERE operation_date BETWEEN ? AND ? "
+        f"ORDER BY {amount} DESC, rowid LIMIT ?",
+        (start_date, end_date, limit),
+    )
+
+    logging.info(f"Топ-{limit} транзакций успешно определены")
+    return top.to_dict(orient="records")
+
+
+@report_decorator()
+def spending_by_category_db(db_path, category, date):
+    """Возвращает траты по категории за последние три месяца от заданной даты, фильтруя их в базе"""
+    date = parse_report_date(date)
+    start_date = date - timedelta(days=90)
+
+    transactions = select_transactions(
+        db_path,
+        "category = ? AND operation_date BETWEEN ? AND ?",
+        (category, start_date.strftime(DATE_TIME_FORMAT), date.strftime(DATE_TIME_FORMAT)),
+    )
+
+    logging.info("Количество транзакций в категории '%s' за последние три месяца: %d", category, len(transactions))
+    return transactions
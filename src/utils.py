@@ -3,6 +3,7 @@ import logging
 import os
 from datetime import datetime
 
+import numpy as np
 import pandas as pd
 import requests
 from dotenv import load_dotenv
@@ -15,6 +16,12 @@ API_KEY_STOCK = os.getenv("API_KEY_STOCK")
 # Настройка логирования
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
+# Столбцы сумм и их валют, которые пересчитываются в базовую валюту
+BASE_CURRENCY_COLUMNS = {
+    "Сумма операции": ("Валюта операции", "Сумма операции в базовой валюте"),
+    "Сумма платежа": ("Валюта платежа", "Сумма платежа в базовой валюте"),
+}
+
 
 def text_of_the_greeting(current_time=datetime.now()):
     """Функция, которая смотрит на текущее время и возвращает приветствие"""
@@ -48,6 +55,19 @@ def data_from_excel(file_path):
     return transactions
 
 
+def encode_descriptions(transactions):
+    """Кодирует описания и категории словарем уникальных строк с целочисленными кодами"""
+    logging.info("Построение словаря уникальных описаний и категорий")
+
+    encoded = transactions.copy()
+    for column in ("Описание", "Категория"):
+        if column in encoded.columns:
+            encoded[column] = encoded[column].astype("category")
+            logging.info(f"Уникальных значений в столбце '{column}': {len(encoded[column].cat.categories)}")
+
+    return encoded
+
+
 def filter_transactions_by_date(transactions, date_time_str):
     """Фильтрует транзакции по заданной дате"""
 
@@ -79,23 +99,71 @@ def filter_transactions_by_date(transactions, date_time_str):
     return filtered_transactions
 
 
-def calculate_card_info(transactions):
+def convert_to_base_currency(transactions, rates_table, base_currency):
+    """Добавляет столбцы сумм в базовой валюте по курсам на дату операции.
+
+    rates_table - DataFrame со столбцами timestamp, currency, rate (стоимость единицы валюты в базовой валюте)
+    """
+    logging.info(f"Пересчет сумм транзакций в базовую валюту: {base_currency}")
+
+    converted = transactions.copy()
+    dates = pd.to_datetime(converted["Дата операции"], format="%d.%m.%Y %H:%M:%S", errors="coerce")
+
+    rates = rates_table.loc[:, ["timestamp", "currency", "rate"]].copy()
+    rates["timestamp"] = pd.to_datetime(rates["timestamp"])
+    rates["rate"] = rates["rate"].astype(float)
+    rates = rates.sort_values("timestamp")
+
+    for amount_column, (currency_column, base_column) in BASE_CURRENCY_COLUMNS.items():
+        if amount_column not in converted.columns or currency_column not in converted.columns:
+            continue
+
+        # Одно соединение по времени для всех транзакций: курс на момент операции.
+        # Для операций раньше начала истории курса нет - более поздний курс дал бы лишь оценку суммы
+        operations = pd.DataFrame({"date": dates, "currency": converted[currency_column]}).reset_index(drop=True)
+        operations["row"] = np.arange(len(operations))
+        operations = operations.dropna(subset=["date"]).sort_values("date")
+        backward = pd.merge_asof(
+            operations, rates, left_on="date", right_on="timestamp", by="currency", direction="backward"
+        )
+
+        operation_rates = np.full(len(converted), np.nan)
+        operation_rates[backward["row"].to_numpy()] = backward["rate"].to_numpy()
+        operation_rates[(converted[currency_column] == base_currency).to_numpy()] = 1.0
+
+        converted[base_column] = (converted[amount_column].to_numpy() * operation_rates).round(2)
+
+    # Без курса валюты операции берется списание банка, если оно уже в базовой валюте
+    amount_column, (_, base_column) = "Сумма операции", BASE_CURRENCY_COLUMNS["Сумма операции"]
+    if base_column in converted.columns and {"Сумма платежа", "Валюта платежа"} <= set(converted.columns):
+        payment_fallback = converted[base_column].isna() & (converted["Валюта платежа"] == base_currency)
+        converted.loc[payment_fallback, base_column] = converted.loc[payment_fallback, "Сумма платежа"]
+
+    # Операции, которые так и не удалось пересчитать, не должны молча выпадать из сумм по картам
+    for amount_column, (currency_column, base_column) in BASE_CURRENCY_COLUMNS.items():
+        if base_column not in converted.columns:
+            continue
+        missing = converted[base_column].isna() & converted[amount_column].notna()
+        if missing.any():
+            missing_currencies = ", ".join(map(str, converted.loc[missing, currency_column].unique()))
+            logging.error(f"Курсы для валют не найдены: {missing_currencies}")
+            raise ValueError(f"Курсы для валют не найдены: {missing_currencies}")
+
+    logging.info("Суммы транзакций успешно пересчитаны в базовую валюту")
+    return converted
+
+
+def calculate_card_info(transactions, amount_column="Сумма операции"):
     """Вычисляет информацию по картам"""
 
     logging.info("Вычисление информации по картам")
-    if "Номер карты" not in transactions.columns or "Сумма операции" not in transactions.columns:
+    if "Номер карты" not in transactions.columns or amount_column not in transactions.columns:
         logging.error("Необходимые столбцы отсутствуют в данных транзакций")
         raise ValueError("Необходимые столбцы отсутствуют в данных транзакций")
 
     # Вычисление общей суммы расходов и кешбэка по картам
-    card_info = (
-        transactions.groupby("Номер карты")
-        .agg(
-            total_spent=pd.NamedAgg(column="Сумма операции", aggfunc="sum"),
-            cashback=pd.NamedAgg(column="Сумма операции", aggfunc=lambda x: round(sum(x) * 0.01, 2)),
-        )
-        .reset_index()
-    )
+    card_info = transactions.groupby("Номер карты")[amount_column].sum().rename("total_spent").reset_index()
+    card_info["cashback"] = card_info["total_spent"].apply(lambda total: round(total * 0.01, 2))
 
     # 4 цифры номера карты
     card_info["last_digits"] = card_info["Номер карты"].astype(str).str[-4:]
@@ -108,11 +176,11 @@ def calculate_card_info(transactions):
     return cards_data
 
 
-def top_transactions(transactions):
+def top_transactions(transactions, amount_column="Сумма платежа"):
     """Функция, которая ищет топ 5 транзакций и выводит данные по ним"""
 
     logging.info("Определение топ-5 транзакций по сумме платежа")
-    if "Дата операции" not in transactions.columns or "Сумма платежа" not in transactions.columns:
+    if "Дата операции" not in transactions.columns or amount_column not in transactions.columns:
         logging.error("В транзакциях DataFrame отсутствуют требуемые столбцы")
         raise ValueError("В транзакциях DataFrame отсутствуют требуемые столбцы")
 
@@ -122,16 +190,16 @@ def top_transactions(transactions):
     )
 
     # Сортировка по сумме платежа в порядке убывания и выбор топ-5 транзакций
-    sorted_transactions = transactions.sort_values(by="Сумма платежа", ascending=False)
+    sorted_transactions = transactions.sort_values(by=amount_column, ascending=False, kind="stable")
     top_5_transactions = sorted_transactions.head(5)
 
     # Формирование списка словарей
-    top_transactions_data = top_5_transactions[["Дата операции", "Сумма платежа", "Категория", "Описание"]].copy()
+    top_transactions_data = top_5_transactions[["Дата операции", amount_column, "Категория", "Описание"]].copy()
     top_transactions_data["Дата операции"] = top_transactions_data["Дата операции"].dt.strftime("%d.%m.%Y")
     top_transactions_data = top_transactions_data.rename(
         columns={
             "Дата операции": "date",
-            "Сумма платежа": "amount",
+            amount_column: "amount",
             "Категория": "category",
             "Описание": "description",
         }
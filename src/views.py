@@ -1,31 +1,45 @@
 import json
 
-from src.utils import (API_KEY_CURRENCY, API_KEY_STOCK, calculate_card_info, data_from_user_settings,
-                       filter_transactions_by_date, info_currency_rates, info_stock_prices, text_of_the_greeting,
-                       top_transactions)
+from src.market_data import currency_rates_table, get_currency_rates, get_stock_prices
+from src.rollup import calculate_card_info_from_rollup, top_transactions_from_rollup
+from src.storage import calculate_card_info_db, has_base_currency_amounts, top_transactions_db
+from src.utils import (API_KEY_CURRENCY, API_KEY_STOCK, BASE_CURRENCY_COLUMNS, calculate_card_info,
+                       convert_to_base_currency, data_from_user_settings, filter_transactions_by_date,
+                       info_currency_rates, info_stock_prices, text_of_the_greeting, top_transactions)
 
 
-def get_main_page(date_time_str, all_transactions, file_path_user_settings, base_currency):
-    # Фильтрация транзакций по дате
-    transactions = filter_transactions_by_date(all_transactions, date_time_str)
+def get_market_quotes(date_time_str, user_currencies, user_stocks, base_currency, market_data_path=None):
+    """Возвращает курсы валют и цены на акции для главной страницы"""
+    if market_data_path is not None:
+        # Котировки на заданную дату из локального хранилища, API - только для недостающих данных
+        currency_rates = get_currency_rates(
+            market_data_path, API_KEY_CURRENCY, base_currency, user_currencies, date_time_str
+        )
+        stock_prices = get_stock_prices(market_data_path, API_KEY_STOCK, user_stocks, date_time_str)
+    else:
+        # Получение курсов валют
+        currency_rates = info_currency_rates(API_KEY_CURRENCY, base_currency, user_currencies)
+
+        # Получение цен на акции
+        stock_prices = info_stock_prices(API_KEY_STOCK, user_stocks)
+
+    return currency_rates, stock_prices
 
+
+def main_page_response(
+    date_time_str, card_info, top_5_transactions, file_path_user_settings, base_currency, market_data_path=None
+):
+    """Формирует JSON-ответ главной страницы по уже вычисленным картам и топ-5 транзакций"""
     # Загрузка пользовательских настроек
     user_currencies, user_stocks = data_from_user_settings(file_path_user_settings)
 
     # Генерация приветствия
     greeting = text_of_the_greeting()
 
-    # Вычисление информации по картам
-    card_info = calculate_card_info(transactions)
-
-    # Получение топ-5 транзакций
-    top_5_transactions = top_transactions(transactions)
-
-    # Получение курсов валют
-    currency_rates = info_currency_rates(API_KEY_CURRENCY, base_currency, user_currencies)
-
-    # Получение цен на акции
-    stock_prices = info_stock_prices(API_KEY_STOCK, user_stocks)
+    # Получение курсов валют и цен на акции
+    currency_rates, stock_prices = get_market_quotes(
+        date_time_str, user_currencies, user_stocks, base_currency, market_data_path
+    )
 
     # Формирование JSON-ответа
     response = {
@@ -37,3 +51,74 @@ def get_main_page(date_time_str, all_transactions, file_path_user_settings, base
     }
     json_response = json.dumps(response, ensure_ascii=False, indent=4)
     return json_response
+
+
+def get_main_page(
+    date_time_str, all_transactions, file_path_user_settings, base_currency, market_data_path=None, rollup=None
+):
+    # Итоги подходят, если для расчета в базовой валюте они построены по пересчитанным суммам
+    if rollup is not None and (
+        market_data_path is None or BASE_CURRENCY_COLUMNS["Сумма операции"][1] in rollup["columns"]
+    ):
+        return get_main_page_from_rollup(
+            date_time_str, all_transactions, file_path_user_settings, base_currency, market_data_path, rollup
+        )
+
+    # Фильтрация транзакций по дате
+    transactions = filter_transactions_by_date(all_transactions, date_time_str)
+
+    # Суммы операций и платежей, по которым считаются карты и топ транзакций
+    operation_amount, payment_amount = "Сумма операции", "Сумма платежа"
+    if market_data_path is not None:
+        # Пересчет сумм в базовую валюту по курсам на дату операции из хранилища
+        transactions = convert_to_base_currency(
+            transactions, currency_rates_table(market_data_path, base_currency), base_currency
+        )
+        if BASE_CURRENCY_COLUMNS[operation_amount][1] in transactions.columns:
+            operation_amount = BASE_CURRENCY_COLUMNS[operation_amount][1]
+        if BASE_CURRENCY_COLUMNS[payment_amount][1] in transactions.columns:
+            payment_amount = BASE_CURRENCY_COLUMNS[payment_amount][1]
+
+    # Вычисление информации по картам
+    card_info = calculate_card_info(transactions, operation_amount)
+
+    # Получение топ-5 транзакций
+    top_5_transactions = top_transactions(transactions, payment_amount)
+
+    return main_page_response(
+        date_time_str, card_info, top_5_transactions, file_path_user_settings, base_currency, market_data_path
+    )
+
+
+def get_main_page_from_db(date_time_str, db_path, file_path_user_settings, base_currency, market_data_path=None):
+    # Суммы в базовой валюте используются, если транзакции были пересчитаны перед сохранением в базу
+    operation_amount, payment_amount = "Сумма операции", "Сумма платежа"
+    if market_data_path is not None and has_base_currency_amounts(db_path):
+        operation_amount = BASE_CURRENCY_COLUMNS[operation_amount][1]
+        payment_amount = BASE_CURRENCY_COLUMNS[payment_amount][1]
+
+    # Фильтрация по дате, агрегация по картам и выбор топ-5 транзакций выполняются в базе
+    card_info = calculate_card_info_db(db_path, date_time_str, operation_amount)
+    top_5_transactions = top_transactions_db(db_path, date_time_str, payment_amount)
+
+    return main_page_response(
+        date_time_str, card_info, top_5_transactions, file_path_user_settings, base_currency, market_data_path
+    )
+
+
+def get_main_page_from_rollup(
+    date_time_str, all_transactions, file_path_user_settings, base_currency, market_data_path, rollup
+):
+    # Суммы в базовой валюте, если задано хранилище котировок (итоги построены по пересчитанным суммам)
+    operation_amount, payment_amount = "Сумма операции", "Сумма платежа"
+    if market_data_path is not None:
+        operation_amount = BASE_CURRENCY_COLUMNS[operation_amount][1]
+        payment_amount = BASE_CURRENCY_COLUMNS[payment_amount][1]
+
+    # Карты и топ-5 транзакций с начала месяца - по итогам, сырые строки - только за неполный день
+    card_info = calculate_card_info_from_rollup(rollup, all_transactions, date_time_str, operation_amount)
+    top_5_transactions = top_transactions_from_rollup(rollup, all_transactions, date_time_str, payment_amount)
+
+    return main_page_response(
+        date_time_str, card_info, top_5_transactions, file_path_user_settings, base_currency, market_data_path
+    )
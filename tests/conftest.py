@@ -1,5 +1,8 @@
+import numpy as np
 import pytest
 
+from tests.synthetic_data import synthetic_transactions as generate_transactions
+
 
 @pytest.fixture
 def data_transactions():
@@ -28,3 +31,14 @@ def data_transactions_date_time():
 def data_transactions_empty():
     """Фикстура для предоставления пустых данных для создания DataFrame"""
     return {"Дата операции": [], "Сумма операции": [], "Категория": []}
+
+
+@pytest.fixture
+def synthetic_transactions():
+    """Фикстура с синтетическими транзакциями за два года по четырем картам, с повторяющимися суммами.
+
+    Индекс перемешан, чтобы проверять сохранение исходных меток строк.
+    """
+    transactions = generate_transactions(3000, seed=7, start="2020-01-01", days=2 * 365, cards=4)
+    transactions.index = np.random.default_rng(7).permutation(len(transactions)) + 1000
+    return transactions
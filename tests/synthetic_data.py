@@ -0,0 +1,21 @@
+import numpy as np
+import pandas as pd
+
+
+def synthetic_transactions(rows, seed=42, start="2019-01-01", days=3 * 365, cards=50):
+    """Создает синтетические транзакции с датами-строками, как в выгрузке, и повторяющимися суммами платежа.
+
+    Часть операций без номера карты, суммы платежа кратны 10, поэтому среди них много равных.
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.Timestamp(start) + pd.to_timedelta(rng.integers(0, days * 24 * 3600, rows), unit="s")
+    return pd.DataFrame(
+        {
+            "Дата операции": dates.strftime("%d.%m.%Y %H:%M:%S"),
+            "Номер карты": rng.choice([f"*{number:04d}" for number in range(1000, 1000 + cards)] + [None], rows),
+            "Сумма операции": rng.integers(-500000, 10000, rows) / 100,
+            "Сумма платежа": rng.integers(-50, 5, rows) * 10.0,
+            "Категория": pd.Categorical(rng.choice(["Супермаркеты", "Фастфуд", "Переводы", "Транспорт"], rows)),
+            "Описание": pd.Categorical(rng.choice(["Магнит", "Колхоз", "Перевод", "Метро"], rows)),
+        }
+    )
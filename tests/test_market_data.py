@@ -0,0 +1,180 @@
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from src.market_data import (backfill_currency_rates, backfill_stock_prices, currency_rates_as_of,
+                             currency_rates_table, get_currency_rates, get_stock_prices, normalize_timestamp,
+                             save_currency_rates, stock_prices_as_of)
+
+
+@pytest.fixture
+def market_data_path(tmp_path):
+    """Фикстура с хранилищем котировок, заполненным из выгрузок"""
+    db_path = tmp_path / "market_data.db"
+    rates_file = tmp_path / "rates.csv"
+    stocks_file = tmp_path / "stocks.csv"
+    pd.DataFrame(
+        {
+            "timestamp": ["2020-04-01", "2020-04-20", "2020-05-01", "2020-04-01"],
+            "base_currency": ["RUB", "RUB", "RUB", "RUB"],
+            "currency": ["USD", "USD", "USD", "EUR"],
+            "rate": [77.73, 74.55, 73.2, 85.0],
+        }
+    ).to_csv(rates_file, index=False)
+    pd.DataFrame(
+        {"timestamp": ["2020-04-24", "2020-04-27 10:00:00"], "stock": ["AAPL", "AAPL"], "price": [282.97, 283.17]}
+    ).to_csv(stocks_file, index=False)
+
+    backfill_currency_rates(db_path, rates_file)
+    backfill_stock_prices(db_path, stocks_file)
+    return db_path
+
+
+def test_normalize_timestamp():
+    """Тестирует приведение даты к строке для хранилища"""
+    assert normalize_timestamp("2020-04-27") == "2020-04-27 00:00:00"
+    assert normalize_timestamp("2020-04-27 19:30:30") == "2020-04-27 19:30:30"
+
+
+def test_normalize_timestamp_invalid():
+    """Тестирует возникновение ошибки при некорректной дате"""
+    with pytest.raises(ValueError, match="Некорректный формат даты и времени"):
+        normalize_timestamp("27.04.2020")
+
+
+def test_backfill_missing_columns(tmp_path):
+    """Тестирует возникновение ошибки при отсутствии столбцов в выгрузке"""
+    file_path = tmp_path / "rates.csv"
+    pd.DataFrame({"timestamp": ["2020-04-01"], "currency": ["USD"]}).to_csv(file_path, index=False)
+
+    with pytest.raises(ValueError, match="В выгрузке отсутствуют столбцы: base_currency, rate"):
+        backfill_currency_rates(tmp_path / "market_data.db", file_path)
+
+
+def test_currency_rates_as_of(market_data_path):
+    """Тестирует поиск последних известных курсов на заданную дату"""
+    currency_rates, missing = currency_rates_as_of(
+        market_data_path, "RUB", ["USD", "EUR", "CNY"], "2020-04-27 19:30:30"
+    )
+
+    assert currency_rates == [{"currency": "USD", "rate": 74.55}, {"currency": "EUR", "rate": 85.0}]
+    assert missing == ["CNY"]
+
+
+def test_currency_rates_as_of_before_history(market_data_path):
+    """Тестирует поиск курсов на дату раньше начала истории"""
+    currency_rates, missing = currency_rates_as_of(market_data_path, "RUB", ["USD"], "2019-12-31")
+
+    assert currency_rates == []
+    assert missing == ["USD"]
+
+
+def test_stock_prices_as_of(market_data_path):
+    """Тестирует поиск последних известных цен акций на заданную дату"""
+    stock_prices, missing = stock_prices_as_of(market_data_path, ["AAPL", "TSLA"], "2020-04-27 09:00:00")
+
+    assert stock_prices == [{"stock": "AAPL", "price": 282.97}]
+    assert missing == ["TSLA"]
+
+
+def test_get_currency_rates_offline(market_data_path):
+    """Тестирует, что при наличии данных в хранилище API не вызывается"""
+    with patch("src.market_data.info_currency_rates") as mock_api:
+        result = get_currency_rates(
+            market_data_path, "key", "RUB", ["USD", "EUR"], "2020-04-27 19:30:30", max_age=timedelta(days=30)
+        )
+
+    mock_api.assert_not_called()
+    assert result == [{"currency": "USD", "rate": 74.55}, {"currency": "EUR", "rate": 85.0}]
+
+
+def test_get_currency_rates_fallback(market_data_path):
+    """Тестирует запрос недостающих курсов через API и их сохранение в хранилище для отчета на сегодня"""
+    today = datetime.now().strftime("%Y-%m-%d 23:59:59")
+    save_currency_rates(market_data_path, "RUB", [{"currency": "USD", "rate": 73.2}], datetime.now())
+    with patch("src.market_data.info_currency_rates", return_value=[{"currency": "CNY", "rate": 10.45}]) as mock_api:
+        result = get_currency_rates(market_data_path, "key", "RUB", ["CNY", "USD"], today)
+
+    mock_api.assert_called_once_with("key", "RUB", ["CNY"])
+    assert result == [{"currency": "CNY", "rate": 10.45}, {"currency": "USD", "rate": 73.2}]
+
+    currency_rates, missing = currency_rates_as_of(market_data_path, "RUB", ["CNY"], "2100-01-01")
+    assert currency_rates == [{"currency": "CNY", "rate": 10.45}]
+
+
+def test_get_currency_rates_past_date_not_saved(market_data_path):
+    """Тестирует, что текущие курсы не сохраняются в хранилище для отчета за прошлую дату"""
+    with patch("src.market_data.info_currency_rates", return_value=[{"currency": "CNY", "rate": 10.45}]):
+        result = get_currency_rates(
+            market_data_path, "key", "RUB", ["CNY", "USD"], "2020-04-27 19:30:30", max_age=timedelta(days=30)
+        )
+
+    assert result == [{"currency": "CNY", "rate": 10.45}, {"currency": "USD", "rate": 74.55}]
+
+    currency_rates, missing = currency_rates_as_of(market_data_path, "RUB", ["CNY"], "2100-01-01")
+    assert missing == ["CNY"]
+
+
+def test_get_currency_rates_unrequested_currency(market_data_path):
+    """Тестирует, что незапрошенная валюта из ответа API не приводит к ошибке и идет в конце"""
+    fetched_rates = [{"currency": "GBP", "rate": 95.0}, {"currency": "CNY", "rate": 10.45}]
+    with patch("src.market_data.info_currency_rates", return_value=fetched_rates):
+        result = get_currency_rates(
+            market_data_path, "key", "RUB", ["CNY", "USD"], "2020-04-27 19:30:30", max_age=timedelta(days=30)
+        )
+
+    assert [item["currency"] for item in result] == ["CNY", "USD", "GBP"]
+
+
+def test_get_currency_rates_stale_snapshot(tmp_path):
+    """Тестирует, что устаревший курс в хранилище не используется для отчета на сегодня"""
+    db_path = tmp_path / "market_data.db"
+    save_currency_rates(db_path, "RUB", [{"currency": "USD", "rate": 70.0}], "2024-01-01")
+    today = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    with patch("src.market_data.info_currency_rates", return_value=[{"currency": "USD", "rate": 90.0}]) as mock_api:
+        result = get_currency_rates(db_path, "key", "RUB", ["USD"], today)
+
+    mock_api.assert_called_once_with("key", "RUB", ["USD"])
+    assert result == [{"currency": "USD", "rate": 90.0}]
+
+    currency_rates, missing = currency_rates_as_of(db_path, "RUB", ["USD"], "2100-01-01")
+    assert currency_rates == [{"currency": "USD", "rate": 90.0}]
+
+
+def test_get_currency_rates_past_date_max_age(market_data_path):
+    """Тестирует, что для прошлой даты курс старше max_age считается отсутствующим"""
+    with patch("src.market_data.info_currency_rates", return_value=[{"currency": "EUR", "rate": 86.0}]) as mock_api:
+        result = get_currency_rates(market_data_path, "key", "RUB", ["USD", "EUR"], "2020-04-24 12:00:00")
+
+    mock_api.assert_called_once_with("key", "RUB", ["EUR"])
+    assert result == [{"currency": "USD", "rate": 74.55}, {"currency": "EUR", "rate": 86.0}]
+
+
+def test_get_stock_prices_fallback(market_data_path):
+    """Тестирует запрос недостающих цен акций через API"""
+    with patch("src.market_data.info_stock_prices", return_value=[{"stock": "TSLA", "price": 725.15}]) as mock_api:
+        result = get_stock_prices(market_data_path, "key", ["AAPL", "TSLA"], "2020-04-27 19:30:30")
+
+    mock_api.assert_called_once_with("key", ["TSLA"])
+    assert result == [{"stock": "AAPL", "price": 283.17}, {"stock": "TSLA", "price": 725.15}]
+
+
+def test_save_currency_rates_replaces_snapshot(tmp_path):
+    """Тестирует перезапись курса на тот же момент времени"""
+    db_path = tmp_path / "market_data.db"
+    save_currency_rates(db_path, "RUB", [{"currency": "USD", "rate": 70.0}], "2020-04-27")
+    save_currency_rates(db_path, "RUB", [{"currency": "USD", "rate": 71.0}], "2020-04-27")
+
+    currency_rates, missing = currency_rates_as_of(db_path, "RUB", ["USD"], "2020-04-27")
+    assert currency_rates == [{"currency": "USD", "rate": 71.0}]
+
+
+def test_currency_rates_table(market_data_path):
+    """Тестирует выгрузку истории курсов валют из хранилища"""
+    rates_table = currency_rates_table(market_data_path, "RUB")
+
+    assert rates_table["currency"].tolist() == ["EUR", "USD", "USD", "USD"]
+    assert rates_table["timestamp"].iloc[-1] == pd.Timestamp("2020-05-01")
@@ -0,0 +1,84 @@
+import pandas as pd
+import pytest
+
+from src.parallel import (calculate_card_info_parallel, partition_by_card, partition_by_position,
+                          spending_by_category_parallel, top_transactions_parallel)
+from src.reports import spending_by_category
+from src.rollup import build_rollup
+from src.utils import calculate_card_info, top_transactions
+
+
+def test_partition_by_card(synthetic_transactions):
+    """Тестирует, что все операции карты попадают в одну часть"""
+    shards = partition_by_card(synthetic_transactions, 3)
+
+    assert len(shards) == 3
+    assert sum(len(shard) for shard in shards) == synthetic_transactions["Номер карты"].notna().sum()
+    cards = [set(shard["Номер карты"]) for shard in shards]
+    assert all(not first & second for i, first in enumerate(cards) for second in cards[i + 1:])
+
+
+def test_partition_by_position(synthetic_transactions):
+    """Тестирует деление на части подряд идущих строк с сохранением всех строк и их порядка"""
+    shards = partition_by_position(synthetic_transactions, 4)
+
+    assert len(shards) == 4
+    pd.testing.assert_frame_equal(pd.concat(shards), synthetic_transactions)
+    assert max(len(shard) for shard in shards) - min(len(shard) for shard in shards) <= 1
+
+
+@pytest.mark.parametrize("workers, use_threads", [(1, False), (2, False), (3, True)])
+def test_calculate_card_info_parallel(synthetic_transactions, workers, use_threads):
+    """Тестирует точное совпадение параллельного и последовательного расчета по картам"""
+    expected = calculate_card_info(synthetic_transactions)
+
+    assert calculate_card_info_parallel(synthetic_transactions, workers, use_threads=use_threads) == expected
+
+
+@pytest.mark.parametrize("workers, use_threads", [(1, False), (2, False), (4, True)])
+def test_top_transactions_parallel(synthetic_transactions, workers, use_threads):
+    """Тестирует точное совпадение топ-5 транзакций, включая порядок при равных суммах"""
+    expected = top_transactions(synthetic_transactions.copy())
+
+    result = top_transactions_parallel(synthetic_transactions, workers, use_threads=use_threads)
+
+    assert result == expected
+
+
+@pytest.mark.parametrize("workers, use_threads", [(2, False), (4, True)])
+def test_spending_by_category_parallel(synthetic_transactions, workers, use_threads, tmp_path, monkeypatch):
+    """Тестирует точное совпадение трат по категории при параллельном расчете"""
+    monkeypatch.chdir(tmp_path)
+    expected = spending_by_category(synthetic_transactions.copy(), "Супермаркеты", "2021-10-15 12:00:00")
+
+    result = spending_by_category_parallel(
+        synthetic_transactions, "Супермаркеты", "2021-10-15 12:00:00", workers, use_threads
+    )
+
+    pd.testing.assert_frame_equal(result, expected)
+
+
+@pytest.mark.parametrize("workers, use_threads", [(1, False), (2, False), (3, True)])
+def test_spending_by_category_parallel_rollup_window(
+    synthetic_transactions, workers, use_threads, tmp_path, monkeypatch
+):
+    """Тестирует совпадение трат по категории, если сначала по итогам выбирается окно, а делится только оно"""
+    monkeypatch.chdir(tmp_path)
+    expected = spending_by_category(synthetic_transactions.copy(), "Супермаркеты", "2021-10-15 12:00:00")
+
+    result = spending_by_category_parallel(
+        synthetic_transactions,
+        "Супермаркеты",
+        "2021-10-15 12:00:00",
+        workers,
+        use_threads,
+        rollup=build_rollup(synthetic_transactions),
+    )
+
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_calculate_card_info_parallel_missing_columns():
+    """Тестирует возникновение ошибки при отсутствии столбцов"""
+    with pytest.raises(ValueError, match="Необходимые столбцы отсутствуют в данных транзакций"):
+        calculate_card_info_parallel(pd.DataFrame({"Номер карты": []}), 2)
@@ -0,0 +1,159 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.reports import spending_by_category, spending_by_category_total
+from src.rollup import (build_rollup, calculate_card_info_from_rollup, load_rollup, rollup_path, split_window,
+                        top_transactions_from_rollup)
+from src.utils import calculate_card_info, convert_to_base_currency, filter_transactions_by_date, top_transactions
+
+
+def test_build_rollup(synthetic_transactions):
+    """Тестирует суммы и количество операций в ячейках итогов"""
+    rollup = build_rollup(synthetic_transactions)
+    cells = rollup["cells"]
+
+    assert cells["count"].sum() == len(synthetic_transactions)
+    assert cells["Сумма операции"].sum() == pytest.approx(synthetic_transactions["Сумма операции"].sum())
+    assert len(rollup["top"]["Сумма платежа"]) == np.minimum(cells["count"], 5).sum()
+    assert (np.diff(rollup["dates"]) >= np.timedelta64(0)).all()
+
+
+def test_build_rollup_missing_columns():
+    """Тестирует возникновение ошибки при отсутствии столбцов"""
+    with pytest.raises(ValueError, match="Необходимые столбцы отсутствуют в данных транзакций"):
+        build_rollup(pd.DataFrame({"Дата операции": [], "Сумма операции": []}))
+
+
+def test_split_window():
+    """Тестирует деление окна на полные дни и неполные дни на краях"""
+    first_day, last_day, edges = split_window(pd.Timestamp("2020-04-01"), pd.Timestamp("2020-04-27 19:30:30"))
+
+    assert first_day == pd.Timestamp("2020-04-01")
+    assert last_day == pd.Timestamp("2020-04-27")
+    assert edges == [(pd.Timestamp("2020-04-27"), pd.Timestamp("2020-04-27 19:30:30"))]
+
+    first_day, last_day, edges = split_window(
+        pd.Timestamp("2020-01-28 19:30:30"), pd.Timestamp("2020-04-27 19:30:30")
+    )
+
+    assert first_day == pd.Timestamp("2020-01-29")
+    assert len(edges) == 2
+
+
+@pytest.mark.parametrize("date_time_str", ["2020-03-15 12:00:00", "2020-05-01 00:00:00", "2020-06-30 23:59:59"])
+def test_main_page_from_rollup_matches_raw_rows(synthetic_transactions, date_time_str):
+    """Тестирует совпадение информации по картам и топ-5 транзакций по итогам и по всем строкам"""
+    rollup = build_rollup(synthetic_transactions)
+    transactions = filter_transactions_by_date(synthetic_transactions, date_time_str)
+
+    expected_cards = calculate_card_info(transactions)
+    result_cards = calculate_card_info_from_rollup(rollup, synthetic_transactions, date_time_str)
+
+    assert [card["last_digits"] for card in result_cards] == [card["last_digits"] for card in expected_cards]
+    for result, expected in zip(result_cards, expected_cards):
+        assert result["total_spent"] == round(expected["total_spent"], 2)
+        assert result["cashback"] == expected["cashback"]
+
+    expected_top = top_transactions(transactions.copy())
+    assert json.dumps(top_transactions_from_rollup(rollup, synthetic_transactions, date_time_str)) == json.dumps(
+        expected_top
+    )
+
+
+def test_spending_by_category_with_rollup(synthetic_transactions, tmp_path, monkeypatch):
+    """Тестирует совпадение трат по категории при выборке строк окна по итогам"""
+    monkeypatch.chdir(tmp_path)
+    rollup = build_rollup(synthetic_transactions)
+
+    expected = spending_by_category(synthetic_transactions.copy(), "Фастфуд", "2020-05-20 10:00:00")
+    result = spending_by_category(synthetic_transactions, "Фастфуд", "2020-05-20 10:00:00", rollup)
+
+    pd.testing.assert_frame_equal(result, expected)
+
+    total = spending_by_category_total(synthetic_transactions, "Фастфуд", "2020-05-20 10:00:00", rollup)
+
+    assert total["Сумма операций"][0] == round(expected["Сумма операции"].sum(), 2)
+    assert total["Количество операций"][0] == len(expected)
+
+
+def test_spending_by_category_with_rollup_unparsed_dates(synthetic_transactions, tmp_path, monkeypatch):
+    """Тестирует, что строки с датой в другом формате не выпадают из трат по категории при выборке по итогам"""
+    monkeypatch.chdir(tmp_path)
+    transactions = synthetic_transactions.copy()
+    transactions.iloc[[3, 10, 20], 0] = ["2020-05-10 12:00:00", "10.05.2020", "2019-05-10 12:00:00"]
+    transactions.iloc[[3, 10, 20], transactions.columns.get_loc("Категория")] = "Фастфуд"
+    rollup = build_rollup(transactions)
+
+    expected = spending_by_category(transactions.copy(), "Фастфуд", "2020-05-20 10:00:00")
+    result = spending_by_category(transactions, "Фастфуд", "2020-05-20 10:00:00", rollup)
+
+    assert len(rollup["unparsed"]) == 3
+    assert transactions.index[3] in expected.index and transactions.index[10] in expected.index
+    pd.testing.assert_frame_equal(result, expected)
+
+    total = spending_by_category_total(transactions, "Фастфуд", "2020-05-20 10:00:00", rollup)
+
+    assert total["Количество операций"][0] == len(expected)
+
+
+def test_rollup_other_transactions(synthetic_transactions, tmp_path, monkeypatch):
+    """Тестирует возникновение ошибки, если переданы не те транзакции, по которым построены итоги"""
+    monkeypatch.chdir(tmp_path)
+    rollup = build_rollup(synthetic_transactions)
+
+    with pytest.raises(ValueError, match="Итоги построены по другим данным транзакций"):
+        spending_by_category(synthetic_transactions.iloc[::-1], "Фастфуд", "2020-05-20 10:00:00", rollup)
+    with pytest.raises(ValueError, match="Итоги построены по другим данным транзакций"):
+        calculate_card_info_from_rollup(rollup, synthetic_transactions.head(100), "2020-05-20 10:00:00")
+    with pytest.raises(ValueError, match="Итоги построены по другим данным транзакций"):
+        top_transactions_from_rollup(rollup, synthetic_transactions.iloc[::-1], "2020-05-20 10:00:00")
+
+
+def test_load_rollup(synthetic_transactions, tmp_path):
+    """Тестирует сохранение итогов рядом с файлом данных и их перестроение после изменения файла"""
+    file_path = str(tmp_path / "operations.xlsx")
+    with open(file_path, "w", encoding="utf-8") as file:
+        file.write("")
+
+    rollup = load_rollup(file_path, synthetic_transactions)
+
+    assert os.path.exists(rollup_path(file_path))
+    assert rollup_path(file_path) == str(tmp_path / "operations.rollup.pkl")
+    pd.testing.assert_frame_equal(load_rollup(file_path, synthetic_transactions)["cells"], rollup["cells"])
+
+    os.utime(file_path, (0, 0))
+    assert load_rollup(file_path, synthetic_transactions.head(10))["cells"]["count"].sum() == 10
+
+
+def test_load_rollup_rebuilt_after_rates_change(tmp_path):
+    """Тестирует перестроение итогов, если изменились курсы, по которым суммы пересчитаны в базовую валюту"""
+    file_path = str(tmp_path / "operations.xlsx")
+    with open(file_path, "w", encoding="utf-8") as file:
+        file.write("")
+    transactions = pd.DataFrame(
+        {
+            "Дата операции": ["01.04.2020 12:00:00"],
+            "Номер карты": ["*7197"],
+            "Сумма операции": [-10.0],
+            "Валюта операции": ["USD"],
+            "Категория": ["Супермаркеты"],
+            "Описание": ["Магнит"],
+        }
+    )
+
+    for rate, expected in [(70.0, -700.0), (80.0, -800.0)]:
+        rates_table = pd.DataFrame({"timestamp": ["2020-03-01"], "currency": ["USD"], "rate": [rate]})
+        converted = convert_to_base_currency(transactions, rates_table, "RUB")
+        rollup = load_rollup(file_path, converted, rates_table=rates_table)
+
+        assert rollup["cells"]["Сумма операции в базовой валюте"].tolist() == [expected]
+
+
+def test_load_rollup_file_not_found(synthetic_transactions, tmp_path):
+    """Тестирует возникновение ошибки при отсутствии файла данных"""
+    with pytest.raises(ValueError, match="не найден"):
+        load_rollup(str(tmp_path / "missing.xlsx"), synthetic_transactions)
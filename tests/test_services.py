@@ -1,8 +1,12 @@
 import json
 
+import numpy as np
 import pandas as pd
+import pytest
 
-from src.services import dataframe_to_dict_with_str, search_transactions
+from src.services import (bounded_edit_distance, build_search_index, dataframe_to_dict_with_str, match_term,
+                          search_transactions, search_transactions_dataframe, search_transactions_ranked, tokenize)
+from src.utils import encode_descriptions
 
 
 def test_dataframe_to_dict_with_str_valid_data():
@@ -95,3 +99,156 @@ def test_search_transactions_invalid_data():
     result = search_transactions(transactions, query)
     expected = [{"Категория": "Развлечения", "Описание": "Билеты в кино", "Сумма": 200.0}]
     assert json.loads(result) == expected
+
+
+def test_tokenize():
+    """
+    Тестирует разбиение русских и латинских названий на слова.
+    """
+    assert tokenize("Ozon.ru") == ["ozon", "ru"]
+    assert tokenize("Пятёрочка, СУПЕРМАРКЕТ №1") == ["пятерочка", "супермаркет", "1"]
+
+
+@pytest.mark.parametrize(
+    "first, second, max_distance, expected",
+    [
+        ("магнит", "магнит", 1, 0),
+        ("магнт", "магнит", 1, 1),
+        ("магнит", "магнат", 2, 1),
+        ("кино", "такси", 1, 2),
+        ("ozon", "ozonru", 1, 2),
+    ],
+)
+def test_bounded_edit_distance(first, second, max_distance, expected):
+    """
+    Тестирует расстояние Левенштейна с ограничением.
+    """
+    assert bounded_edit_distance(first, second, max_distance) == expected
+
+
+@pytest.fixture
+def search_transactions_data():
+    """Фикстура с транзакциями для ранжированного поиска"""
+    return [
+        {"Категория": "Супермаркеты", "Описание": "Магнит", "Сумма": 100.0},
+        {"Категория": "Различные товары", "Описание": "Ozon.ru", "Сумма": 500.0},
+        {"Категория": "Супермаркеты", "Описание": "Пятёрочка", "Сумма": 200.0},
+        {"Категория": "Развлечения", "Описание": "Магнитола", "Сумма": 300.0},
+        {"Категория": "Супермаркеты", "Описание": "Магнит", "Сумма": 150.0},
+        "Некорректная запись",
+    ]
+
+
+def test_search_transactions_ranked_typo(search_transactions_data):
+    """
+    Тестирует поиск с опечаткой: точные совпадения выше совпадений по началу слова.
+    """
+    result = json.loads(search_transactions_ranked(search_transactions_data, "магнт"))
+
+    assert result["total"] == 2
+    assert [transaction["Сумма"] for transaction in result["transactions"]] == [100.0, 150.0]
+
+    result = json.loads(search_transactions_ranked(search_transactions_data, "магнит"))
+
+    assert [transaction["Сумма"] for transaction in result["transactions"]] == [100.0, 150.0, 300.0]
+
+
+def test_search_transactions_ranked_and_or(search_transactions_data):
+    """
+    Тестирует многословные запросы в режимах AND и OR.
+    """
+    result_and = json.loads(search_transactions_ranked(search_transactions_data, "супермаркеты пятерочка"))
+    result_or = json.loads(search_transactions_ranked(search_transactions_data, "супермаркеты ozon", mode="or"))
+
+    assert [transaction["Сумма"] for transaction in result_and["transactions"]] == [200.0]
+    assert [transaction["Сумма"] for transaction in result_or["transactions"]] == [100.0, 500.0, 200.0, 150.0]
+
+
+def test_search_transactions_ranked_pagination(search_transactions_data):
+    """
+    Тестирует постраничную выдачу результатов.
+    """
+    index = build_search_index(search_transactions_data)
+    result = json.loads(
+        search_transactions_ranked(search_transactions_data, "магнит", limit=1, offset=1, index=index)
+    )
+
+    assert result["total"] == 3
+    assert result["offset"] == 1
+    assert result["limit"] == 1
+    assert [transaction["Сумма"] for transaction in result["transactions"]] == [150.0]
+
+
+def test_search_transactions_ranked_invalid_mode(search_transactions_data):
+    """
+    Тестирует возникновение ошибки при неизвестном режиме поиска.
+    """
+    with pytest.raises(ValueError, match="Режим поиска должен быть 'and' или 'or'"):
+        search_transactions_ranked(search_transactions_data, "магнит", mode="not")
+
+
+def test_match_term_many_typos_positive_weight(search_transactions_data):
+    """
+    Тестирует, что при большом max_typos вес совпадения с опечатками остается положительным.
+    """
+    weights = match_term(build_search_index(search_transactions_data), "сппермаркттыыы", 10)
+
+    assert weights
+    assert all(weight > 0 for weight in weights.values())
+
+    result = json.loads(
+        search_transactions_ranked(search_transactions_data, "сппермаркттыыы пятерочка", max_typos=10)
+    )
+    assert [transaction["Сумма"] for transaction in result["transactions"]] == [200.0]
+
+
+def test_search_transactions_ranked_negative_max_typos(search_transactions_data):
+    """
+    Тестирует возникновение ошибки при отрицательном max_typos.
+    """
+    with pytest.raises(ValueError, match="max_typos должен быть неотрицательным"):
+        search_transactions_ranked(search_transactions_data, "магнит", max_typos=-1)
+
+
+def test_search_transactions_dataframe():
+    """
+    Тестирует поиск по закодированным описаниям в DataFrame.
+    """
+    df = encode_descriptions(
+        pd.DataFrame(
+            {
+                "Категория": ["Продукты", "Развлечения", "Развлечения", "Транспорт"],
+                "Описание": ["Покупка в супермаркете", "Билеты в кино", "Билеты в КИНО", "Проезд на автобусе"],
+                "Сумма": [150.0, 200.0, 250.0, 50.0],
+            }
+        )
+    )
+
+    result = search_transactions_dataframe(df, "Кино")
+
+    expected = [
+        {"Категория": "Развлечения", "Описание": "Билеты в кино", "Сумма": 200.0},
+        {"Категория": "Развлечения", "Описание": "Билеты в КИНО", "Сумма": 250.0},
+    ]
+    assert json.loads(result) == expected
+
+
+def test_search_transactions_dataframe_matches_list_search():
+    """
+    Тестирует совпадение поиска по DataFrame с поиском по списку словарей.
+    """
+    df = pd.DataFrame(
+        {
+            "Категория": ["Продукты", 1234, "Транспорт", "Переводы", "Nana"],
+            "Описание": [5678, "Билеты в кино", "Проезд на автобусе", np.nan, None],
+            "Сумма": [150.0, 200.0, 50.0, 10.0, 20.0],
+        }
+    )
+
+    # Пропуски сравниваются строкой, как в search_transactions ('nan', 'None')
+    for query in ["кино", "56", "1234", "одежда", "nan", "none"]:
+        assert search_transactions_dataframe(df, query) == search_transactions(dataframe_to_dict_with_str(df), query)
+
+    df = encode_descriptions(df)
+    for query in ["кино", "nan", "none"]:
+        assert search_transactions_dataframe(df, query) == search_transactions(dataframe_to_dict_with_str(df), query)
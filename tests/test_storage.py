@@ -0,0 +1,137 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from src.storage import (calculate_card_info_db, filter_transactions_by_date_db, has_base_currency_amounts,
+                         save_transactions_to_db, spending_by_category_db, top_transactions_db)
+from src.reports import spending_by_category
+from src.utils import calculate_card_info, filter_transactions_by_date, top_transactions
+
+
+@pytest.fixture
+def transactions_df():
+    """Фикстура с транзакциями в формате Excel-файла"""
+    return pd.DataFrame(
+        {
+            "Дата операции": [
+                "30.03.2020 10:00:00",
+                "01.04.2020 00:00:00",
+                "15.04.2020 12:30:00",
+                "27.04.2020 19:30:30",
+                "27.04.2020 20:00:00",
+                "20.04.2020 09:15:00",
+            ],
+            "Номер карты": ["*7197", "*7197", "*4556", "*7197", "*4556", None],
+            "Сумма операции": [-50.0, -100.0, -200.0, -300.0, -400.0, 500.0],
+            "Сумма платежа": [-50.0, -100.0, -200.0, -300.0, -400.0, 500.0],
+            "Категория": ["Супермаркеты", "Супермаркеты", "Фастфуд", "Супермаркеты", "Фастфуд", "Пополнения"],
+            "Описание": ["Магнит", "Колхоз", "OOO Frittella", "Магнит", "Mouse Tail", "Пополнение"],
+        }
+    )
+
+
+@pytest.fixture
+def db_path(tmp_path, transactions_df):
+    """Фикстура с базой, заполненной транзакциями"""
+    path = tmp_path / "transactions.db"
+    save_transactions_to_db(transactions_df, path)
+    return path
+
+
+def test_save_transactions_to_db_replaces_data(db_path, transactions_df):
+    """Тестирует, что повторное сохранение заменяет ранее сохраненные транзакции"""
+    assert save_transactions_to_db(transactions_df, db_path) == 6
+    assert len(filter_transactions_by_date_db(db_path, "2020-04-30 00:00:00")) == 5
+
+
+def test_filter_transactions_by_date_db(db_path, transactions_df):
+    """Тестирует совпадение фильтрации по дате в базе и в DataFrame"""
+    result = filter_transactions_by_date_db(db_path, "2020-04-27 19:30:30")
+    expected = filter_transactions_by_date(transactions_df, "2020-04-27 19:30:30")
+
+    assert result["Дата операции"].tolist() == pd.to_datetime(expected["Дата операции"]).tolist()
+    assert result["Сумма операции"].tolist() == expected["Сумма операции"].tolist()
+
+
+def test_filter_transactions_by_date_db_invalid_date(db_path):
+    """Тестирует возникновение ошибки при некорректной дате"""
+    with pytest.raises(ValueError, match="Некорректный формат даты и времени"):
+        filter_transactions_by_date_db(db_path, "27.04.2020")
+
+
+def test_calculate_card_info_db(db_path, transactions_df):
+    """Тестирует совпадение информации по картам из базы и из DataFrame"""
+    expected = calculate_card_info(filter_transactions_by_date(transactions_df, "2020-04-27 19:30:30"))
+
+    assert calculate_card_info_db(db_path, "2020-04-27 19:30:30") == expected
+    assert expected == [
+        {"last_digits": "4556", "total_spent": -200.0, "cashback": -2.0},
+        {"last_digits": "7197", "total_spent": -400.0, "cashback": -4.0},
+    ]
+
+
+def test_top_transactions_db(db_path):
+    """Тестирует выбор топ транзакций в базе"""
+    result = top_transactions_db(db_path, "2020-04-27 19:30:30", limit=2)
+
+    assert result == [
+        {"date": "20.04.2020", "amount": 500.0, "category": "Пополнения", "description": "Пополнение"},
+        {"date": "01.04.2020", "amount": -100.0, "category": "Супермаркеты", "description": "Колхоз"},
+    ]
+
+
+def test_top_transactions_db_matches_dataframe(db_path, transactions_df):
+    """Тестирует совпадение топ-5 транзакций из базы и из DataFrame"""
+    expected = top_transactions(filter_transactions_by_date(transactions_df, "2020-04-27 19:30:30"))
+
+    assert top_transactions_db(db_path, "2020-04-27 19:30:30") == expected
+
+
+def test_top_transactions_db_unknown_column(db_path):
+    """Тестирует возникновение ошибки при неизвестном столбце суммы"""
+    with pytest.raises(ValueError, match="В базе транзакций отсутствуют требуемые столбцы"):
+        top_transactions_db(db_path, "2020-04-27 19:30:30", "Сумма")
+
+
+def test_spending_by_category_db(db_path, tmp_path, monkeypatch):
+    """Тестирует выбор трат по категории за три месяца в базе"""
+    monkeypatch.chdir(tmp_path)
+    result = spending_by_category_db(db_path, "Супермаркеты", "2020-04-27 19:30:30")
+
+    assert result["Дата операции"].tolist() == [
+        datetime(2020, 3, 30, 10, 0, 0),
+        datetime(2020, 4, 1, 0, 0, 0),
+        datetime(2020, 4, 27, 19, 30, 30),
+    ]
+    assert result["Описание"].tolist() == ["Магнит", "Колхоз", "Магнит"]
+
+
+def test_spending_by_category_db_matches_dataframe(transactions_df, tmp_path, monkeypatch):
+    """Тестирует совпадение трат по категории в базе и в DataFrame, включая даты в другом формате"""
+    monkeypatch.chdir(tmp_path)
+    transactions_df["Дата платежа"] = ["31.03.2020", "02.04.2020", "16.04.2020", "28.04.2020", "28.04.2020", None]
+    transactions_df.loc[1, "Дата операции"] = "2020-04-01 00:00:00"
+    save_transactions_to_db(transactions_df, tmp_path / "transactions.db")
+
+    result = spending_by_category_db(tmp_path / "transactions.db", "Супермаркеты", "2020-04-27 19:30:30")
+    expected = spending_by_category(transactions_df.copy(), "Супермаркеты", "2020-04-27 19:30:30")
+
+    pd.testing.assert_frame_equal(result, expected.reset_index(drop=True))
+
+
+def test_save_transactions_to_db_invalid_date(transactions_df, tmp_path):
+    """Тестирует возникновение ошибки, если дату операции нельзя разобрать"""
+    transactions_df.loc[0, "Дата операции"] = "не дата"
+
+    with pytest.raises(ValueError, match="Некорректный формат даты операции в 1 транзакциях"):
+        save_transactions_to_db(transactions_df, tmp_path / "transactions.db")
+
+
+def test_has_base_currency_amounts(db_path, tmp_path, transactions_df):
+    """Тестирует проверку наличия сумм в базовой валюте"""
+    assert not has_base_currency_amounts(db_path)
+
+    transactions_df["Сумма операции в базовой валюте"] = transactions_df["Сумма операции"]
+    save_transactions_to_db(transactions_df, tmp_path / "converted.db")
+    assert has_base_currency_amounts(tmp_path / "converted.db")
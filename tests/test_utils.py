@@ -5,8 +5,8 @@ from unittest.mock import mock_open, patch
 import pandas as pd
 import pytest
 
-from src.utils import (calculate_card_info, data_from_excel, data_from_user_settings, filter_transactions_by_date,
-                       text_of_the_greeting, top_transactions)
+from src.utils import (calculate_card_info, convert_to_base_currency, data_from_excel, data_from_user_settings,
+                       encode_descriptions, filter_transactions_by_date, text_of_the_greeting, top_transactions)
 
 
 @pytest.mark.parametrize(
@@ -234,3 +234,114 @@ def test_data_from_user_settings():
 
     assert user_currencies == ["USD", "EUR"]
     assert user_stocks == ["AAPL", "GOOGL"]
+
+
+def test_convert_to_base_currency():
+    """
+    Тестирует пересчет сумм в базовую валюту по курсу на дату операции.
+    """
+    data = {
+        "Дата операции": ["01.04.2020 12:00:00", "25.04.2020 12:00:00", "26.04.2020 12:00:00", "01.03.2020 12:00:00"],
+        "Сумма операции": [-10.0, -10.0, -100.0, -2.0],
+        "Валюта операции": ["USD", "USD", "RUB", "USD"],
+        "Сумма платежа": [-777.3, -745.5, -100.0, -134.0],
+        "Валюта платежа": ["RUB", "RUB", "RUB", "RUB"],
+    }
+    rates_table = pd.DataFrame(
+        {
+            "timestamp": ["2020-04-01", "2020-04-20"],
+            "currency": ["USD", "USD"],
+            "rate": [77.73, 74.55],
+        }
+    )
+
+    result = convert_to_base_currency(pd.DataFrame(data), rates_table, "RUB")
+
+    # Для операции раньше начала истории курса нет, используется списание банка в базовой валюте
+    assert result["Сумма операции в базовой валюте"].tolist() == [-777.3, -745.5, -100.0, -134.0]
+
+
+def test_convert_to_base_currency_before_history():
+    """
+    Тестирует возникновение ошибки для операции раньше начала истории курсов без списания в базовой валюте.
+    """
+    data = {
+        "Дата операции": ["01.03.2020 12:00:00"],
+        "Сумма операции": [-2.0],
+        "Валюта операции": ["USD"],
+    }
+    rates_table = pd.DataFrame({"timestamp": ["2020-04-01"], "currency": ["USD"], "rate": [77.73]})
+
+    with pytest.raises(ValueError, match="Курсы для валют не найдены: USD"):
+        convert_to_base_currency(pd.DataFrame(data), rates_table, "RUB")
+
+
+def test_convert_to_base_currency_missing_rate():
+    """
+    Тестирует возникновение ошибки, если курс для валюты не найден и списание не в базовой валюте.
+    """
+    data = {
+        "Дата операции": ["01.04.2020 12:00:00", "02.04.2020 12:00:00"],
+        "Сумма платежа": [-10.0, -100.0],
+        "Валюта платежа": ["TRY", "RUB"],
+    }
+    rates_table = pd.DataFrame(columns=["timestamp", "currency", "rate"])
+
+    with pytest.raises(ValueError, match="Курсы для валют не найдены: TRY"):
+        convert_to_base_currency(pd.DataFrame(data), rates_table, "RUB")
+
+
+def test_convert_to_base_currency_missing_rate_payment_fallback():
+    """
+    Тестирует, что операция без курса учитывается в сумме по карте по списанию в базовой валюте.
+    """
+    data = {
+        "Дата операции": ["01.04.2020 12:00:00", "02.04.2020 12:00:00", "03.04.2020 12:00:00"],
+        "Номер карты": ["*4556", "*4556", "*4556"],
+        "Сумма операции": [-10.0, -150.0, -100.0],
+        "Валюта операции": ["USD", "TRY", "RUB"],
+        "Сумма платежа": [-777.3, -1569.0, -100.0],
+        "Валюта платежа": ["RUB", "RUB", "RUB"],
+    }
+    rates_table = pd.DataFrame({"timestamp": ["2020-04-01"], "currency": ["USD"], "rate": [77.73]})
+
+    result = convert_to_base_currency(pd.DataFrame(data), rates_table, "RUB")
+
+    assert result["Сумма операции в базовой валюте"].tolist() == [-777.3, -1569.0, -100.0]
+    assert calculate_card_info(result, "Сумма операции в базовой валюте") == [
+        {"last_digits": "4556", "total_spent": -2446.3, "cashback": -24.46}
+    ]
+
+
+def test_calculate_card_info_base_currency():
+    """
+    Тестирует вычисление информации по картам по суммам в базовой валюте.
+    """
+    data = {
+        "Номер карты": ["*5678", "*5678"],
+        "Сумма операции": [10, 200],
+        "Сумма операции в базовой валюте": [750.0, 200.0],
+    }
+
+    result = calculate_card_info(pd.DataFrame(data), "Сумма операции в базовой валюте")
+
+    assert result == [{"last_digits": "5678", "total_spent": 950.0, "cashback": 9.5}]
+
+
+def test_encode_descriptions():
+    """
+    Тестирует кодирование описаний и категорий словарем уникальных строк.
+    """
+    data = {
+        "Категория": ["Супермаркеты", "Супермаркеты", "Различные товары"],
+        "Описание": ["Магнит", "Магнит", "Ozon.ru"],
+        "Сумма операции": [100, 200, 300],
+    }
+    df = pd.DataFrame(data)
+
+    result = encode_descriptions(df)
+
+    assert list(result["Описание"].cat.categories) == ["Ozon.ru", "Магнит"]
+    assert result["Описание"].cat.codes.tolist() == [1, 1, 0]
+    assert result["Категория"].tolist() == data["Категория"]
+    assert df["Описание"].dtype == object